@@ -0,0 +1,191 @@
+import wave
+import threading
+from math import gcd
+
+import numpy as np
+from scipy.signal import resample_poly
+
+# Частота, с которой работают движки распознавания
+RECOGNIZER_SAMPLE_RATE = 16000
+
+
+def resample(samples, sample_rate, target_rate=RECOGNIZER_SAMPLE_RATE):
+    """Полифазная передискретизация int16 моно-сигнала"""
+    if sample_rate == target_rate:
+        return samples
+    divisor = gcd(sample_rate, target_rate)
+    resampled = resample_poly(samples.astype(np.float32), target_rate // divisor, sample_rate // divisor)
+    return np.clip(np.rint(resampled), -32768, 32767).astype(np.int16)
+
+
+def read_wav(path):
+    """16-битный PCM WAV как int16 моно-сигнал: (сэмплы, частота)"""
+    try:
+        with wave.open(path, 'rb') as f:
+            if f.getsampwidth() != 2:
+                raise ValueError("Поддерживается только 16-битный PCM")
+            channels = f.getnchannels()
+            sample_rate = f.getframerate()
+            samples = np.frombuffer(f.readframes(f.getnframes()), dtype='<i2')
+    except (wave.Error, EOFError):
+        raise ValueError("Файл не в формате WAV")
+    if channels > 1:
+        # Каналы сводим в моно средним
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return samples, sample_rate
+
+
+class AudioCaptureService:
+    """Постоянно открытый входной поток с кольцевым буфером"""
+
+    def __init__(self, sample_rate=44100, buffer_duration=10.0, block_duration=0.03):
+        self.sample_rate = sample_rate
+        self.capacity = int(sample_rate * buffer_duration)
+        self.block_size = int(sample_rate * block_duration)
+        self.buffer = np.zeros(self.capacity, dtype=np.int16)
+        self.position = 0  # Сколько сэмплов записано с момента открытия
+        self.condition = threading.Condition()
+        # start и stop вызываются и из окна игры, и из потока распознавания
+        self.lock = threading.Lock()
+        self.stream = None
+
+    @property
+    def active(self):
+        return self.stream is not None
+
+    def start(self):
+        """Открыть устройство один раз, повторный вызов ничего не делает"""
+        with self.lock:
+            if self.stream is not None:
+                return
+            import sounddevice as sd
+            stream = sd.InputStream(samplerate=self.sample_rate, channels=1, dtype='int16',
+                                    blocksize=self.block_size, callback=self._callback)
+            stream.start()
+            with self.condition:
+                self.stream = stream
+
+    def stop(self):
+        """Освободить устройство; ожидающее чтение получит ошибку «Микрофон закрыт»"""
+        with self.lock:
+            if self.stream is None:
+                return
+            stream = self.stream
+            with self.condition:
+                self.stream = None
+                self.condition.notify_all()
+            stream.stop()
+            stream.close()
+
+    def _callback(self, indata, frames, time_info, status):
+        data = indata[:, 0]
+        with self.condition:
+            start = self.position % self.capacity
+            first = min(frames, self.capacity - start)
+            self.buffer[start:start + first] = data[:first]
+            self.buffer[:frames - first] = data[first:]
+            self.position += frames
+            self.condition.notify_all()
+
+    def mark(self):
+        """Текущая позиция в потоке, с нее начинается новая запись"""
+        with self.condition:
+            return self.position
+
+    def read(self, start, count, timeout=1.0):
+        """Сэмплы с позиции start, ждет пока они будут записаны"""
+        end = start + count
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.position >= end or self.stream is None, timeout):
+                raise RuntimeError("Нет звука с микрофона")
+            if self.stream is None:
+                raise RuntimeError("Микрофон закрыт")
+            if self.position - start > self.capacity:
+                raise RuntimeError("Буфер записи переполнен")
+            offset = start % self.capacity
+            if offset + count <= self.capacity:
+                return self.buffer[offset:offset + count].copy()
+            return np.concatenate((self.buffer[offset:], self.buffer[:offset + count - self.capacity]))
+
+
+class VoiceActivityDetector:
+    """Детектор речи по энергии и частоте переходов через ноль"""
+
+    def __init__(self, sample_rate, max_duration=3.0, block_duration=0.03,
+                 silence_duration=0.6, preroll_duration=0.15, min_rms=300):
+        self.sample_rate = sample_rate
+        self.block_size = int(sample_rate * block_duration)
+        self.max_samples = int(sample_rate * max_duration)
+        self.silence_blocks = max(1, int(silence_duration / block_duration))
+        self.preroll_blocks = max(1, int(preroll_duration / block_duration))
+        self.min_rms = min_rms
+
+        self.blocks = []
+        self.samples = 0
+        self.noise_rms = None
+        self.speech_start = None
+        self.speech_end = None
+        self.silent_run = 0
+        self.done = False
+
+    @staticmethod
+    def block_features(block):
+        """RMS и доля переходов через ноль для блока"""
+        data = block.astype(np.float32)
+        rms = float(np.sqrt(np.mean(data * data))) if len(data) else 0.0
+        signs = np.signbit(block)
+        zcr = float(np.count_nonzero(signs[1:] != signs[:-1])) / max(1, len(block) - 1)
+        return rms, zcr
+
+    def is_speech(self, rms, zcr):
+        """Решение речь/тишина для одного блока"""
+        noise = self.noise_rms if self.noise_rms is not None else 0.0
+        threshold = max(self.min_rms, noise * 3)
+        if rms >= threshold:
+            return True
+        # Тихие шипящие согласные: мало энергии, но много переходов через ноль
+        return rms >= threshold * 0.5 and 0.1 <= zcr <= 0.5
+
+    def feed(self, block):
+        """Добавить блок сэмплов, возвращает True когда запись можно остановить"""
+        if self.done:
+            return True
+
+        rms, zcr = self.block_features(block)
+        speech = self.is_speech(rms, zcr)
+        index = len(self.blocks)
+        self.blocks.append(block)
+        self.samples += len(block)
+
+        if speech:
+            if self.speech_start is None:
+                self.speech_start = index
+            self.speech_end = index
+            self.silent_run = 0
+        else:
+            # Оцениваем уровень шума только по блокам без речи
+            if self.noise_rms is None:
+                self.noise_rms = rms
+            else:
+                self.noise_rms = 0.9 * self.noise_rms + 0.1 * rms
+            if self.speech_start is not None:
+                self.silent_run += 1
+
+        if self.speech_start is not None and self.silent_run >= self.silence_blocks:
+            self.done = True
+        elif self.samples >= self.max_samples:
+            self.done = True
+        return self.done
+
+    @property
+    def fill_percent(self):
+        """Заполненность буфера в процентах"""
+        return min(100, int(self.samples * 100 / self.max_samples))
+
+    def speech(self):
+        """Фрагмент с речью без тишины в начале, либо None"""
+        if self.speech_start is None:
+            return None
+        start = max(0, self.speech_start - self.preroll_blocks)
+        end = min(len(self.blocks), self.speech_end + 1 + self.preroll_blocks)
+        return np.concatenate(self.blocks[start:end])
@@ -0,0 +1,337 @@
+"""Замеры скорости POLYGLOT без окна (QT_QPA_PLATFORM=offscreen).
+
+    python finish/benchmarks.py [--only startup|hot] [--output results.json]
+
+Холодный импорт замеряется в отдельных процессах, горячие пути - в одном
+процессе с временной папкой пользователя. Результаты в JSON можно сравнивать
+между версиями.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime, timedelta
+
+FINISH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Зависимости, время импорта которых выводится отдельно
+DEPENDENCIES = [
+    'PyQt5.QtWidgets',
+    'PyQt5.QtMultimedia',
+    'numpy',
+    'scipy.signal',
+    'sounddevice',
+    'speech_recognition',
+    'game',
+    'speech',
+]
+
+# Время от старта интерпретатора до показа экрана выбора
+STARTUP_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+sys.path.insert(0, {finish_dir!r})
+from PyQt5.QtWidgets import QApplication
+import game
+app = QApplication(sys.argv)
+window = game.PolyglotGame()
+window.show()
+app.processEvents()
+print(time.perf_counter() - start)
+window.close()
+"""
+
+
+def run_python(code):
+    """Выполнить код в новом процессе, вернуть последнюю строку вывода или None"""
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, env=env)
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip().splitlines()[-1]
+
+
+def bench_import(module, repeat=3):
+    """Холодный импорт модуля, лучшее из repeat запусков в секундах"""
+    code = (f"import sys, time; sys.path.insert(0, {FINISH_DIR!r}); "
+            f"start = time.perf_counter(); import {module}; print(time.perf_counter() - start)")
+    times = [run_python(code) for _ in range(repeat)]
+    times = [float(value) for value in times if value is not None]
+    return min(times) if times else None
+
+
+def bench_startup(repeat=3):
+    """Запуск до экрана выбора, лучшее из repeat запусков в секундах"""
+    times = [run_python(STARTUP_SCRIPT.format(finish_dir=FINISH_DIR)) for _ in range(repeat)]
+    times = [float(value) for value in times if value is not None]
+    return min(times) if times else None
+
+
+def startup_benchmarks():
+    results = {'imports': {}}
+    for module in DEPENDENCIES:
+        results['imports'][module] = bench_import(module)
+    results['startup_to_selection_screen'] = bench_startup()
+    return results
+
+
+def measure(func, repeat=20, setup=None):
+    """Время вызова func: минимум, медиана и среднее в секундах"""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {
+        'min': min(times),
+        'median': statistics.median(times),
+        'mean': statistics.mean(times),
+        'repeat': repeat,
+    }
+
+
+class SyntheticCapture:
+    """Источник звука для замеров: тишина, 0.3 с тона и снова тишина"""
+
+    def __init__(self, sample_rate=44100):
+        import numpy as np
+        self.np = np
+        self.sample_rate = sample_rate
+        t = np.arange(int(sample_rate * 0.3))
+        tone = 8000 * np.sin(2 * np.pi * 220 * t / sample_rate)
+        self.signal = np.concatenate([np.zeros(int(sample_rate * 0.2)), tone,
+                                      np.zeros(sample_rate * 3)]).astype(np.int16)
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def mark(self):
+        return 0
+
+    def read(self, start, count, timeout=1.0):
+        chunk = self.signal[start:start + count]
+        if len(chunk) < count:
+            chunk = self.np.concatenate([chunk, self.np.zeros(count - len(chunk), dtype=self.np.int16)])
+        return chunk
+
+
+def make_synthetic_backend():
+    """Движок распознавания для замеров: сразу возвращает первое слово словаря"""
+    from recognition import RecognizerBackend
+
+    class SyntheticBackend(RecognizerBackend):
+        name = 'synthetic'
+        # Ответ зависит от словаря сессии, как у Vosk с грамматикой
+        uses_grammar = True
+
+        def recognize(self, samples, sample_rate, vocabulary=None):
+            return [(vocabulary[0] if vocabulary else 'apple', 1.0)]
+
+    return SyntheticBackend
+
+
+def bench_speech_pipeline(app, repeat=10):
+    """Запись -> VAD -> передискретизация -> распознавание на синтетическом звуке"""
+    try:
+        import recognition
+        from speech import SpeechWorker
+    except ImportError:
+        return None
+    from PyQt5.QtCore import QEventLoop, QTimer
+
+    recognition.ENGINES.insert(0, make_synthetic_backend())
+    worker = SpeechWorker(SyntheticCapture())
+    worker.start()
+    loop = QEventLoop()
+    worker.finished.connect(lambda request_id, result: loop.quit())
+    request = {'id': 0}
+
+    def run():
+        request['id'] += 1
+        worker.submit(request['id'], 'en-EN', ['apple', 'cat'])
+        QTimer.singleShot(5000, loop.quit)
+        loop.exec_()
+
+    try:
+        return measure(run, repeat)
+    finally:
+        worker.stop()
+        recognition.ENGINES.pop(0)
+
+
+def hot_path_benchmarks():
+    """Замеры внутри одного процесса с временными базами"""
+    home = tempfile.mkdtemp(prefix='polyglot-bench-')
+    os.environ['POLYGLOT_HOME'] = home
+    os.environ['POLYGLOT_ASR'] = 'synthetic'
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    sys.path.insert(0, FINISH_DIR)
+    try:
+        from PyQt5.QtWidgets import QApplication, QMessageBox
+        import game
+        from matching import MatchIndex
+        from session import GameSession, grade_batch
+
+        # Модальные окна заменяем заглушками, иначе замер остановится на первом ответе
+        for name in ('information', 'warning', 'critical'):
+            setattr(QMessageBox, name, staticmethod(lambda *args, **kwargs: None))
+
+        app = QApplication.instance() or QApplication(sys.argv)
+        results = {}
+
+        windows = []
+        results['construct_window'] = measure(lambda: windows.append(game.PolyglotGame()), repeat=5)
+        window = windows[-1]
+        game_window = window.game_window
+
+        # Устный режим работает с синтетическим звуком вместо микрофона
+        speech_available = True
+        try:
+            from speech import SpeechWorker
+        except ImportError:
+            speech_available = False
+        if speech_available:
+            game_window.speech_worker = SpeechWorker(SyntheticCapture())
+            game_window.audio_capture = game_window.speech_worker.capture
+            game_window.speech_worker.start()
+
+        # Старт игры для каждой пары язык/режим
+        modes = [('oral', game_window.mode_oral), ('writing', game_window.mode_writing),
+                 ('test', game_window.mode_test), ('sentence', game_window.mode_sentence),
+                 ('drill', game_window.mode_drill)]
+        start_game = {}
+        for code, language_button in game_window.language_buttons:
+            language_button.setChecked(True)
+            for mode_name, mode_button in modes:
+                if mode_name == 'oral' and not speech_available:
+                    start_game[f'{code}/{mode_name}'] = None
+                    continue
+                mode_button.setChecked(True)
+                start_game[f'{code}/{mode_name}'] = measure(game_window.start_game)
+        results['start_game'] = start_game
+
+        # Проверка ответов: каждый замер начинается с первого слова
+        def reset():
+            game_window.session.index = 0
+            game_window.session.lives = 3
+            game_window.waiting_for_next = False
+
+        game_window.language_buttons[0][1].setChecked(True)
+        game_window.auto_advance.setChecked(False)
+        checkers = {}
+
+        game_window.mode_writing.setChecked(True)
+        game_window.start_game()
+        checkers['writing'] = measure(
+            lambda: (game_window.answer_input.setText(game_window.session.words[0][1]),
+                     game_window.check_writing_answer()), setup=reset)
+
+        game_window.mode_test.setChecked(True)
+        game_window.start_game()
+        checkers['test'] = measure(
+            lambda: (game_window.option_buttons[0].setChecked(True), game_window.check_test_answer()),
+            setup=reset)
+
+        game_window.mode_sentence.setChecked(True)
+        game_window.start_game()
+        checkers['sentence'] = measure(
+            lambda: (game_window.sentence_input.setText(game_window.session.words[0][1]),
+                     game_window.check_sentence_answer()), setup=reset)
+
+        game_window.mode_drill.setChecked(True)
+        game_window.start_game()
+        checkers['drill'] = measure(
+            lambda: (game_window.drill_input.setText(game_window.session.words[0][1]),
+                     game_window.check_drill_answer()), setup=reset)
+
+        # Устная сессия без микрофона: проверяется только разбор гипотез
+        game_window.current_mode = 1
+        game_window.session = GameSession(game_window.library, 'en', 1)
+        word = game_window.session.words[0][0]
+        checkers['speech'] = measure(
+            lambda: game_window.speech_recognized(game_window.request_id, [(word, 0.9), (word + 's', 0.1)]),
+            setup=reset)
+        results['answer_checkers'] = checkers
+
+        # Пакетная проверка 10 000 письменных ответов без окна
+        words = game_window.library.word_bank.sample(*game_window.session.deck, 100)
+        pairs = [(item, item[1] if i % 3 else item[1][:-1]) for i in range(10000 // len(words)) for item in words]
+        results['grade_batch_10k'] = measure(lambda: grade_batch(2, 'en', pairs), repeat=5)
+
+        # Нечеткое сравнение с заранее посчитанными формами ответов
+        index = MatchIndex(['accommodation', 'città'], 'en')
+        results['fuzzy_match'] = {
+            'exact': measure(lambda: index.match('città', 'Citta'), repeat=1000),
+            'typo': measure(lambda: index.match('accommodation', 'acommodatoin'), repeat=1000),
+        }
+
+        # Статистика с 10 000 сыгранных игр
+        store = game_window.stats_store
+        first_day = datetime(2020, 1, 1)
+        with store.connection:
+            for i in range(10000):
+                store.append('Английский', 'Письменный', i % 80, 80, first_day + timedelta(hours=i))
+
+        def open_stats():
+            game_window.show_stats()
+            game_window.stats_model.fetchMore()
+
+        results['show_stats_10k'] = measure(open_stats)
+        results['speech_pipeline'] = bench_speech_pipeline(app)
+
+        window.close()
+        return results
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+
+def print_results(results, indent=''):
+    for name, value in results.items():
+        if isinstance(value, dict) and 'median' in value:
+            print(f"{indent}{name}: {value['median'] * 1000:.3f} мс (мин. {value['min'] * 1000:.3f})")
+        elif isinstance(value, dict):
+            print(f"{indent}{name}:")
+            print_results(value, indent + '    ')
+        elif value is None:
+            print(f"{indent}{name}: недоступно")
+        elif isinstance(value, float):
+            print(f"{indent}{name}: {value * 1000:.1f} мс")
+        else:
+            print(f"{indent}{name}: {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замеры скорости POLYGLOT")
+    parser.add_argument('--only', choices=['startup', 'hot'], help="запустить только одну группу")
+    parser.add_argument('--output', help="куда сохранить результаты в JSON")
+    args = parser.parse_args()
+
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'date': time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    if args.only != 'hot':
+        results['startup'] = startup_benchmarks()
+    if args.only != 'startup':
+        results['hot'] = hot_path_benchmarks()
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=4)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+"""Сборка банка предложений с пропусками из текстового корпуса.
+
+    python finish/cloze.py corpus.txt --language en [--workers 4] [--per-word 20]
+
+Корпус читается кусками по границам строк, куски обрабатываются в пуле
+процессов. Найденные предложения с пропущенным словом из наборов языка
+дописываются в банк слов (набор 'cloze'), его использует режим «Предложения».
+После каждого куска сохраняется смещение в файле, поэтому прерванную сборку
+можно продолжить тем же вызовом.
+"""
+import os
+import re
+import json
+import sys
+import time
+import argparse
+from collections import deque
+from multiprocessing import Pool
+
+from vocabulary import VocabularyRepository
+from wordbank import WordBank, CLOZE_DECK
+
+BLANK = '_____'
+
+# Сколько кусков держать в работе на один процесс
+IN_FLIGHT_PER_WORKER = 2
+
+# Длина подходящего предложения в словах
+MIN_TOKENS = 4
+MAX_TOKENS = 16
+
+SENTENCE_END = re.compile(r'(?<=[.!?…])\s+')
+TOKEN = re.compile(r"\w+(?:['’-]\w+)*")
+
+# Слова наборов в процессе-обработчике, передаются один раз при запуске пула
+_words = None
+
+
+def chunks(path, start, chunk_size):
+    """Границы кусков файла (начало, конец) по концам строк, без чтения файла целиком"""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        while start < size:
+            f.seek(min(start + chunk_size, size))
+            f.readline()
+            end = min(f.tell(), size)
+            yield start, end
+            start = end
+
+
+def sentences(text):
+    """Предложения из текста куска, по строкам"""
+    for line in text.splitlines():
+        for sentence in SENTENCE_END.split(line.strip()):
+            if sentence:
+                yield sentence
+
+
+def make_cloze(sentence, words):
+    """(предложение с пропуском, слово) для первого слова из наборов или None"""
+    tokens = list(TOKEN.finditer(sentence))
+    if not MIN_TOKENS <= len(tokens) <= MAX_TOKENS:
+        return None
+    lowered = [token.group().lower() for token in tokens]
+    for token, word in zip(tokens, lowered):
+        # Повторяющееся слово подсказало бы ответ
+        if word in words and lowered.count(word) == 1:
+            return sentence[:token.start()] + BLANK + sentence[token.end():], word
+    return None
+
+
+def init_worker(words):
+    global _words
+    _words = words
+
+
+def process_chunk(job):
+    """Предложения с пропусками из куска файла: (конец куска, [[предложение, слово]])"""
+    path, start, end, per_word = job
+    with open(path, 'rb') as f:
+        f.seek(start)
+        text = f.read(end - start).decode('utf-8', errors='replace')
+    found = []
+    counts = {}
+    for sentence in sentences(text):
+        cloze = make_cloze(sentence, _words)
+        if cloze is None or counts.get(cloze[1], 0) >= per_word:
+            continue
+        counts[cloze[1]] = counts.get(cloze[1], 0) + 1
+        found.append(list(cloze))
+    return end, found
+
+
+class ClozeBuilder:
+    """Сборка банка с сохранением смещения после каждого куска"""
+
+    def __init__(self, word_bank, code):
+        self.word_bank = word_bank
+        self.code = code
+        self.word_bank.connection.execute("""
+            CREATE TABLE IF NOT EXISTS cloze_progress (
+                corpus TEXT NOT NULL,
+                language TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                PRIMARY KEY (corpus, language)
+            )
+        """)
+
+    def offset(self, corpus):
+        """Сколько байт корпуса уже обработано"""
+        row = self.word_bank.connection.execute(
+            "SELECT offset FROM cloze_progress WHERE corpus = ? AND language = ?", (corpus, self.code)).fetchone()
+        return row[0] if row else 0
+
+    def word_counts(self):
+        """Сколько предложений уже собрано для каждого слова"""
+        counts = {}
+        for (item,) in self.word_bank.connection.execute(
+                "SELECT item FROM words WHERE language = ? AND deck = ?", (self.code, CLOZE_DECK)):
+            word = json.loads(item)[1]
+            counts[word] = counts.get(word, 0) + 1
+        return counts
+
+    def save(self, corpus, end, found, counts, per_word):
+        """Дописать предложения куска и смещение в одной транзакции.
+
+        counts обновляется только по действительно добавленным строкам,
+        повторы уже собранных предложений не считаются. Возвращает число добавленных.
+        """
+        items = []
+        taken = {}
+        for sentence, word in found:
+            if counts.get(word, 0) + taken.get(word, 0) < per_word:
+                taken[word] = taken.get(word, 0) + 1
+                items.append([sentence, word])
+        with self.word_bank.connection:
+            added = self.word_bank.append_items(self.code, CLOZE_DECK, items)
+            self.word_bank.connection.execute(
+                "INSERT OR REPLACE INTO cloze_progress (corpus, language, offset) VALUES (?, ?, ?)",
+                (corpus, self.code, end))
+        for sentence, word in added:
+            counts[word] = counts.get(word, 0) + 1
+        return len(added)
+
+    def build(self, corpus, words, workers=None, chunk_size=8 << 20, per_word=20):
+        """Обработать корпус с места остановки.
+
+        После каждого куска выдает (обработано байт, добавлено предложений).
+        """
+        corpus = os.path.abspath(corpus)
+        start = self.offset(corpus)
+        counts = self.word_counts()
+        added = 0
+        workers = workers or os.cpu_count() or 1
+        jobs = ((corpus, begin, end, per_word) for begin, end in chunks(corpus, start, chunk_size))
+        with Pool(workers, initializer=init_worker, initargs=(words,)) as pool:
+            # Куски забираются по порядку, поэтому смещение растет без пропусков.
+            # В работе не больше IN_FLIGHT_PER_WORKER кусков на процесс: готовые
+            # результаты не копятся в памяти, пока банк сохраняет предыдущие
+            pending = deque()
+            for job in jobs:
+                pending.append(pool.apply_async(process_chunk, (job,)))
+                if len(pending) < workers * IN_FLIGHT_PER_WORKER:
+                    continue
+                end, found = pending.popleft().get()
+                added += self.save(corpus, end, found, counts, per_word)
+                yield end, added
+            while pending:
+                end, found = pending.popleft().get()
+                added += self.save(corpus, end, found, counts, per_word)
+                yield end, added
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сборка предложений с пропусками из корпуса")
+    parser.add_argument('corpus', help="текстовый файл в UTF-8")
+    parser.add_argument('--language', required=True, help="код языка, например en")
+    parser.add_argument('--workers', type=int, help="число процессов, по умолчанию по числу ядер")
+    parser.add_argument('--chunk-mb', type=int, default=8, help="размер куска в мегабайтах")
+    parser.add_argument('--per-word', type=int, default=20, help="предложений на слово")
+    args = parser.parse_args()
+
+    # Слова наборов ищутся в корпусе без учета регистра
+    words = {word.lower() for word in VocabularyRepository().deck_words(args.language)}
+    if not words:
+        sys.exit(f"Нет наборов слов для языка {args.language}")
+
+    builder = ClozeBuilder(WordBank(), args.language)
+    size = os.path.getsize(args.corpus)
+    started = time.monotonic()
+    added = 0
+    for end, added in builder.build(args.corpus, words, args.workers, args.chunk_mb << 20, args.per_word):
+        print(f"\r{end * 100 // max(size, 1)}%  предложений: {added}", end='', flush=True)
+    print(f"\nГотово за {time.monotonic() - started:.1f} с, добавлено предложений: {added}")
+
+
+if __name__ == '__main__':
+    main()
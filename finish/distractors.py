@@ -0,0 +1,96 @@
+import random
+from collections import Counter, defaultdict
+
+from matching import normalize, bounded_distance
+
+# Гласные, которыми заменяются буквы при генерации опечаток
+VOWELS = {
+    'latin': 'aeiou',
+    'cyrillic': 'аеиоуыэюя',
+}
+
+# Насколько далеким по правке может быть слово-сосед
+NEIGHBOUR_DISTANCE = 3
+
+
+def trigrams(word):
+    """Триграммы слова с границами, чтобы учитывались начало и конец"""
+    padded = f' {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def misspellings(word, count, rng=random):
+    """До count правдоподобных опечаток: пропуск, удвоение, перестановка, другая гласная"""
+    vowels = VOWELS['cyrillic'] if any('а' <= char <= 'я' for char in word.lower()) else VOWELS['latin']
+    result = []
+    for _ in range(count * 20):
+        if len(result) >= count:
+            break
+        position = rng.randrange(len(word))
+        operation = rng.randrange(4)
+        if operation == 0 and len(word) > 3:
+            candidate = word[:position] + word[position + 1:]
+        elif operation == 1 and word[position].isalpha():
+            candidate = word[:position] + word[position] + word[position:]
+        elif operation == 2 and position < len(word) - 1:
+            candidate = word[:position] + word[position + 1] + word[position] + word[position + 2:]
+        elif operation == 3 and word[position].lower() in vowels:
+            candidate = word[:position] + rng.choice(vowels) + word[position + 1:]
+        else:
+            continue
+        if normalize(candidate) != normalize(word) and candidate not in result:
+            result.append(candidate)
+    return result
+
+
+class DistractorIndex:
+    """Триграммный индекс слов набора для поиска похожих вариантов ответа"""
+
+    def __init__(self, words):
+        self.words = list(dict.fromkeys(words))
+        self.normalized = [normalize(word) for word in self.words]
+        self.known = set(self.normalized)
+        self.postings = defaultdict(list)
+        for position, word in enumerate(self.normalized):
+            for trigram in trigrams(word):
+                self.postings[trigram].append(position)
+
+    def neighbours(self, word, count):
+        """До count слов набора, ближайших к word по правке"""
+        target = normalize(word)
+        shared = Counter()
+        for trigram in trigrams(target):
+            shared.update(self.postings.get(trigram, ()))
+        # Расстояние считаем только для слов с наибольшим числом общих триграмм
+        found = []
+        for position, common in shared.most_common(count * 10):
+            candidate = self.normalized[position]
+            if candidate == target:
+                continue
+            distance = bounded_distance(target, candidate, NEIGHBOUR_DISTANCE)
+            if distance <= NEIGHBOUR_DISTANCE:
+                found.append((distance, -common, self.words[position]))
+        found.sort()
+        return [word for distance, common, word in found[:count]]
+
+    def options(self, word, count=4, rng=random):
+        """Варианты ответа: слово, соседи из набора и опечатки, в случайном порядке"""
+        options = [word] + self.neighbours(word, (count - 1) // 2)
+        for candidate in misspellings(word, count * 2, rng):
+            if len(options) >= count:
+                break
+            # Опечатка не должна совпасть с другим словом набора
+            if normalize(candidate) not in self.known and candidate not in options:
+                options.append(candidate)
+        rng.shuffle(options)
+        return options
+
+
+def make_test(index, word, translation, adverb, rng=random):
+    """Вопрос теста по паре слово-перевод"""
+    return {
+        'key': word,
+        'question': f"Как будет '{translation}' {adverb}?",
+        'options': index.options(word, rng=rng),
+        'answer': word,
+    }
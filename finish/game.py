@@ -1,229 +1,114 @@
 import sys
-import random
 import time
-import os
-from datetime import datetime
+from collections import OrderedDict
 
-import sounddevice as sd
-import numpy as np
-import scipy.io.wavfile as wav
-import speech_recognition as sr
+from stats import SORT_COLUMNS, format_date
+from matching import MATCH_EXACT, MATCH_CLOSE, MATCH_WRONG
+from session import Library, GameSession, MODE_NAMES, POINTS
 
-from PyQt5.QtWidgets import *
-from PyQt5.QtCore import *
-from PyQt5.QtGui import *
-from PyQt5.QtMultimedia import *
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QFrame, QStackedWidget, QVBoxLayout,
+                             QHBoxLayout, QGroupBox, QLabel, QPushButton, QRadioButton, QButtonGroup,
+                             QLineEdit, QSpinBox, QComboBox, QDateEdit, QProgressBar, QTableView,
+                             QAbstractItemView, QCheckBox, QGraphicsOpacityEffect, QMessageBox, QAction)
+from PyQt5.QtCore import Qt, QDate, QTimer, QPropertyAnimation, QAbstractTableModel, QModelIndex
+from PyQt5.QtGui import QIcon
 
-# Словари для разных языков и уровней сложности
-# Английский
-english_easy = {
-    "apple": "яблоко",
-    "cat": "кот",
-    "dog": "собака",
-    "house": "дом",
-    "book": "книга",
-    "car": "машина",
-    "sun": "солнце",
-    "moon": "луна"
-}
+# Задержка автоперехода к следующему слову, мс
+AUTO_ADVANCE_DELAY = 800
 
-english_medium = {
-    "computer": "компьютер",
-    "garden": "сад",
-    "library": "библиотека",
-    "teacher": "учитель",
-    "student": "ученик",
-    "beautiful": "красивый",
-    "mountain": "гора",
-    "ocean": "океан"
-}
+# Сколько записей произношения держать загруженными и на сколько слов вперед загружать
+SOUND_CACHE_SIZE = 32
+SOUND_PRELOAD_AHEAD = 8
 
-english_hard = {
-    "environment": "окружающая среда",
-    "architecture": "архитектура",
-    "responsibility": "ответственность",
-    "communication": "общение",
-    "international": "международный",
-    "accommodation": "размещение",
-    "accomplishment": "достижение",
-    "acknowledgment": "признание"
-}
+# Модули устного режима (numpy, sounddevice, распознавание речи, QtMultimedia)
+# загружаются только при первом запуске устной игры, см. GameWindow.get_speech_worker
+# и GameWindow.get_sound
 
-# Итальянский
-italian_easy = {
-    "ciao": "привет",
-    "gatto": "кот",
-    "cane": "собака",
-    "casa": "дом",
-    "libro": "книга",
-    "sole": "солнце",
-    "luna": "луна",
-    "acqua": "вода"
-}
-
-italian_medium = {
-    "ragazzo": "мальчик",
-    "ragazza": "девочка",
-    "scuola": "школа",
-    "amico": "друг",
-    "famiglia": "семья",
-    "viaggio": "путешествие",
-    "città": "город",
-    "montagna": "гора"
-}
-
-italian_hard = {
-    "incredibile": "невероятный",
-    "responsabilità": "ответственность",
-    "comunicazione": "общение",
-    "internazionale": "международный",
-    "accomodamento": "размещение",
-    "realizzazione": "достижение",
-    "riconoscimento": "признание"
-}
-
-# Испанский
-spanish_easy = {
-    "hola": "привет",
-    "gato": "кот",
-    "perro": "собака",
-    "casa": "дом",
-    "libro": "книга",
-    "sol": "солнце",
-    "luna": "луна",
-    "agua": "вода"
-}
-
-# Французский
-french_easy = {
-    "bonjour": "привет",
-    "chat": "кот",
-    "chien": "собака",
-    "maison": "дом",
-    "livre": "книга",
-    "soleil": "солнце",
-    "lune": "луна",
-    "eau": "вода"
-}
-
-# Португальский
-portuguese_easy = {
-    "olá": "привет",
-    "gato": "кот",
-    "cachorro": "собака",
-    "casa": "дом",
-    "livro": "книга",
-    "sol": "солнце",
-    "lua": "луна",
-    "água": "вода"
-}
-
-# Предложения для режима "Закончить предложение"
-english_sentences = {
-    "I like to read a _____": "book",
-    "The sky is _____": "blue",
-    "My name _____ John": "is",
-    "I have two _____": "cats"
-}
-
-italian_sentences = {
-    "Mi piace leggere un _____": "libro",
-    "Il cielo è _____": "blu",
-    "Mi _____ Mario": "chiamo",
-    "Ho due _____": "gatti"
-}
-
-# Вопросы для тестов
-english_tests = [
-    {
-        "question": "Как будет 'яблоко' по-английски?",
-        "options": ["apple", "aple", "appple", "apel"],
-        "answer": "apple"
-    },
-    {
-        "question": "Как будет 'книга' по-английски?",
-        "options": ["buk", "book", "boook", "boke"],
-        "answer": "book"
-    }
-]
-
-italian_tests = [
-    {
-        "question": "Как будет 'кот' по-итальянски?",
-        "options": ["gato", "gatto", "gatoo", "gattto"],
-        "answer": "gatto"
-    }
-]
-
-class RecordThread(QThread):
-    """Поток для записи голоса"""
-    finished = pyqtSignal(str)
-    progress = pyqtSignal(int)
+class StatsTableModel(QAbstractTableModel):
+    """Таблица истории игр, строки подгружаются из базы порциями"""
+    headers = ["Дата", "Язык", "Режим", "Счет"]
+    batch_size = 100
     
-    def __init__(self):
+    def __init__(self, store):
         super().__init__()
-        self.duration = 3
-        self.sample_rate = 44100
-        
-    def run(self):
-        try:
-            recording = sd.rec(
-                int(self.duration * self.sample_rate),
-                samplerate=self.sample_rate,
-                channels=1,
-                dtype='int16'
-            )
-            
-            for i in range(self.duration):
-                self.progress.emit(i + 1)
-                time.sleep(1)
-            
-            filename = 'recording.wav'
-            wav.write(filename, self.sample_rate, recording)
-            self.finished.emit(filename)
-        except Exception as e:
-            self.finished.emit(f"ERROR: {str(e)}")
-
-class SpeechThread(QThread):
-    """Поток для распознавания речи"""
-    finished = pyqtSignal(str)
+        self.store = store
+        self.rows = []
+        self.filters = {}
+        self.order_by = 'played_at'
+        self.descending = True
+        self.exhausted = False
     
-    def __init__(self, filename, language_code):
-        super().__init__()
-        self.filename = filename
-        self.language_code = language_code
-        
-    def run(self):
-        recognizer = sr.Recognizer()
-        try:
-            with sr.AudioFile(self.filename) as source:
-                audio = recognizer.record(source)
-                text = recognizer.recognize_google(audio, language=self.language_code)
-                self.finished.emit(text.lower())
-        except sr.UnknownValueError:
-            self.finished.emit("ERROR: Не удалось распознать речь")
-        except sr.RequestError:
-            self.finished.emit("ERROR: Ошибка сервиса")
-        except Exception as e:
-            self.finished.emit(f"ERROR: {str(e)}")
-        finally:
-            if os.path.exists(self.filename):
-                os.remove(self.filename)
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        game_id, played_at, language, mode, score, total = self.rows[index.row()]
+        return [format_date(played_at), language, mode, f"{score}/{total}"][index.column()]
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return None
+    
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+    
+    def fetchMore(self, parent=QModelIndex()):
+        """Следующая порция строк после последней загруженной"""
+        after = None
+        if self.rows:
+            last = self.rows[-1]
+            after = (last[1 + SORT_COLUMNS.index(self.order_by)], last[0])
+        batch = self.store.query(self.filters, self.order_by, self.descending, after, self.batch_size)
+        if len(batch) < self.batch_size:
+            self.exhausted = True
+        if batch:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(batch) - 1)
+            self.rows.extend(batch)
+            self.endInsertRows()
+    
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Сортировка выполняется запросом к базе"""
+        self.order_by = SORT_COLUMNS[column]
+        self.descending = order == Qt.DescendingOrder
+        self.reload()
+    
+    def set_filters(self, filters):
+        self.filters = filters
+        self.reload()
+    
+    def reload(self):
+        """Сбросить загруженные строки, они подгрузятся заново при прокрутке"""
+        self.beginResetModel()
+        self.rows = []
+        self.exhausted = False
+        self.endResetModel()
 
 class GameWindow(QWidget):
     """Главное окно игры"""
     
     def __init__(self):
         super().__init__()
-        self.stats = []
-        self.current_language = None
+        # Словари, банк слов и статистика; правила игры - в GameSession
+        self.library = Library()
+        self.stats_store = self.library.stats_store
+        self.vocabulary_repository = self.library.repository
+        self.session = None
         self.current_mode = None
         self.current_difficulty = None
-        self.current_words = []
-        self.current_word_index = 0
-        self.score = 0
-        self.lives = 3
         self.waiting_for_next = False  # Флаг ожидания перехода к следующему слову
+        self.drill_limit = 0.0  # Время на текущее слово в скоростном режиме
+        self.drill_started = 0.0
+        self.speech_worker = None
+        self.audio_capture = None
+        self.request_id = 0  # Номер текущего запроса распознавания
+        self.sounds = OrderedDict()  # Загруженные записи произношения по путям, последние в конце
+        self.sounds_available = True  # Пока не выяснилось, что QtMultimedia не работает
         self.initUI()
         
     def initUI(self):
@@ -397,19 +282,15 @@ class GameWindow(QWidget):
         lang_group = QGroupBox("🌍 Выберите язык:")
         lang_layout = QVBoxLayout()
         
-        self.lang_english = QRadioButton("🇬🇧 Английский")
-        self.lang_italian = QRadioButton("🇮🇹 Итальянский")
-        self.lang_spanish = QRadioButton("🇪🇸 Испанский")
-        self.lang_french = QRadioButton("🇫🇷 Французский")
-        self.lang_portuguese = QRadioButton("🇵🇹 Португальский")
+        # Языки берутся из пакетов словарей, читаются только их описания
+        self.language_buttons = []
+        for code, language in self.vocabulary_repository.languages():
+            btn = QRadioButton(f"{language['flag']} {language['name']}")
+            lang_layout.addWidget(btn)
+            self.language_buttons.append((code, btn))
         
-        self.lang_english.setChecked(True)
-        
-        lang_layout.addWidget(self.lang_english)
-        lang_layout.addWidget(self.lang_italian)
-        lang_layout.addWidget(self.lang_spanish)
-        lang_layout.addWidget(self.lang_french)
-        lang_layout.addWidget(self.lang_portuguese)
+        if self.language_buttons:
+            self.language_buttons[0][1].setChecked(True)
         
         lang_group.setLayout(lang_layout)
         layout.addWidget(lang_group)
@@ -422,6 +303,7 @@ class GameWindow(QWidget):
         self.mode_writing = QRadioButton("✍️ Письменный (пиши слова)")
         self.mode_test = QRadioButton("📝 Тесты (выбирай ответ)")
         self.mode_sentence = QRadioButton("🔤 Закончить предложение")
+        self.mode_drill = QRadioButton("⚡ Скоростной (переводи на время)")
         
         self.mode_oral.setChecked(True)
         
@@ -429,6 +311,7 @@ class GameWindow(QWidget):
         mode_layout.addWidget(self.mode_writing)
         mode_layout.addWidget(self.mode_test)
         mode_layout.addWidget(self.mode_sentence)
+        mode_layout.addWidget(self.mode_drill)
         
         mode_group.setLayout(mode_layout)
         layout.addWidget(mode_group)
@@ -450,6 +333,20 @@ class GameWindow(QWidget):
         diff_group.setLayout(diff_layout)
         layout.addWidget(diff_group)
         
+        # Длина сессии
+        session_layout = QHBoxLayout()
+        session_layout.addWidget(QLabel("🔢 Слов за игру:"))
+        self.session_length = QSpinBox()
+        self.session_length.setRange(1, 200)
+        self.session_length.setValue(20)
+        session_layout.addWidget(self.session_length)
+        session_layout.addStretch()
+        layout.addLayout(session_layout)
+        
+        self.auto_advance = QCheckBox("⏩ Автоматически переходить к следующему слову")
+        self.auto_advance.setChecked(True)
+        layout.addWidget(self.auto_advance)
+        
         # Кнопки
         button_layout = QHBoxLayout()
         
@@ -528,6 +425,10 @@ class GameWindow(QWidget):
         oral_widget = QWidget()
         oral_layout = QVBoxLayout()
         
+        self.listen_btn = QPushButton("🔊 Послушать")
+        self.listen_btn.setStyleSheet("font-size: 16px; padding: 10px;")
+        self.listen_btn.clicked.connect(self.play_reference)
+        
         self.record_btn = QPushButton("🎤 Начать запись")
         self.record_btn.setStyleSheet("font-size: 18px; padding: 15px;")
         self.record_btn.clicked.connect(self.start_recording)
@@ -538,6 +439,7 @@ class GameWindow(QWidget):
         self.record_status = QLabel("")
         self.record_status.setStyleSheet("font-size: 14px; color: #b0b0b0; qproperty-alignment: AlignCenter;")
         
+        oral_layout.addWidget(self.listen_btn)
         oral_layout.addWidget(self.record_btn)
         oral_layout.addWidget(self.record_progress)
         oral_layout.addWidget(self.record_status)
@@ -597,15 +499,56 @@ class GameWindow(QWidget):
         self.input_widget.addWidget(oral_widget)
         self.input_widget.addWidget(writing_widget)
         self.input_widget.addWidget(test_widget)
+        # Для скоростного режима
+        drill_widget = QWidget()
+        drill_layout = QVBoxLayout()
+        
+        self.drill_countdown = QProgressBar()
+        self.drill_countdown.setTextVisible(True)
+        
+        self.drill_input = QLineEdit()
+        self.drill_input.setPlaceholderText("Введите перевод как можно быстрее...")
+        self.drill_input.returnPressed.connect(self.check_drill_answer)
+        
+        self.drill_submit = QPushButton("✅ Проверить")
+        self.drill_submit.clicked.connect(self.check_drill_answer)
+        
+        drill_layout.addWidget(self.drill_countdown)
+        drill_layout.addWidget(self.drill_input)
+        drill_layout.addWidget(self.drill_submit)
+        drill_widget.setLayout(drill_layout)
+        
+        # Обратный отсчет времени на ответ
+        self.drill_timer = QTimer(self)
+        self.drill_timer.setInterval(100)
+        self.drill_timer.timeout.connect(self.update_drill_countdown)
+        
         self.input_widget.addWidget(sentence_widget)
+        self.input_widget.addWidget(drill_widget)
         
         layout.addWidget(self.input_widget)
         
+        # Плашка с результатом ответа вместо модальных окон
+        self.feedback_label = QLabel("")
+        self.feedback_label.setVisible(False)
+        feedback_effect = QGraphicsOpacityEffect(self.feedback_label)
+        self.feedback_label.setGraphicsEffect(feedback_effect)
+        self.feedback_animation = QPropertyAnimation(feedback_effect, b"opacity", self)
+        self.feedback_animation.setDuration(250)
+        self.feedback_animation.setStartValue(0.0)
+        self.feedback_animation.setEndValue(1.0)
+        layout.addWidget(self.feedback_label)
+        
+        # Таймер автоперехода к следующему слову
+        self.advance_timer = QTimer(self)
+        self.advance_timer.setSingleShot(True)
+        self.advance_timer.timeout.connect(self.advance)
+        
         # Кнопки управления
         control_layout = QHBoxLayout()
         
         self.next_btn = QPushButton("⏭️ Следующее слово")
-        self.next_btn.clicked.connect(self.next_word)
+        self.next_btn.clicked.connect(self.advance)
         self.next_btn.setVisible(False)
         
         back_btn = QPushButton("🏠 В меню")
@@ -630,19 +573,69 @@ class GameWindow(QWidget):
         title.setStyleSheet("font-size: 24px; font-weight: bold; color: #9b59b6; qproperty-alignment: AlignCenter;")
         layout.addWidget(title)
         
-        self.stats_text = QTextEdit()
-        self.stats_text.setReadOnly(True)
-        self.stats_text.setStyleSheet("""
-            QTextEdit {
+        # Фильтры истории
+        filter_layout = QHBoxLayout()
+        
+        self.stats_language = QComboBox()
+        self.stats_mode = QComboBox()
+        self.stats_mode.addItem("Все режимы", "")
+        for mode_name in MODE_NAMES:
+            self.stats_mode.addItem(mode_name, mode_name)
+        
+        # Минимальная дата означает «без ограничения»
+        self.stats_date_from = QDateEdit()
+        self.stats_date_to = QDateEdit()
+        for date_edit in (self.stats_date_from, self.stats_date_to):
+            date_edit.setCalendarPopup(True)
+            date_edit.setDisplayFormat("dd.MM.yyyy")
+            date_edit.setMinimumDate(QDate(2000, 1, 1))
+            date_edit.setSpecialValueText("—")
+            date_edit.setDate(date_edit.minimumDate())
+            date_edit.dateChanged.connect(self.apply_stats_filters)
+        
+        self.stats_language.currentIndexChanged.connect(self.apply_stats_filters)
+        self.stats_mode.currentIndexChanged.connect(self.apply_stats_filters)
+        
+        filter_layout.addWidget(self.stats_language)
+        filter_layout.addWidget(self.stats_mode)
+        filter_layout.addWidget(QLabel("с"))
+        filter_layout.addWidget(self.stats_date_from)
+        filter_layout.addWidget(QLabel("по"))
+        filter_layout.addWidget(self.stats_date_to)
+        layout.addLayout(filter_layout)
+        
+        # История: строки подгружаются при прокрутке
+        self.stats_model = StatsTableModel(self.stats_store)
+        self.stats_table = QTableView()
+        self.stats_table.setModel(self.stats_model)
+        self.stats_table.setSortingEnabled(True)
+        self.stats_table.sortByColumn(0, Qt.DescendingOrder)
+        self.stats_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.stats_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.stats_table.verticalHeader().setVisible(False)
+        self.stats_table.horizontalHeader().setStretchLastSection(True)
+        self.stats_table.setStyleSheet("""
+            QTableView {
                 background-color: #2d2d2d;
                 border: 2px solid #9b59b6;
                 border-radius: 5px;
-                padding: 10px;
                 font-size: 14px;
                 color: #e0e0e0;
+                gridline-color: #4a4a4a;
+            }
+            QHeaderView::section {
+                background-color: #1a1a1a;
+                color: #9b59b6;
+                font-weight: bold;
+                border: none;
+                padding: 5px;
             }
         """)
-        layout.addWidget(self.stats_text)
+        layout.addWidget(self.stats_table)
+        
+        self.stats_summary = QLabel("")
+        self.stats_summary.setStyleSheet("font-size: 16px; color: #e0e0e0;")
+        layout.addWidget(self.stats_summary)
         
         back_btn = QPushButton("🔙 Назад")
         back_btn.clicked.connect(lambda: self.stacked_widget.setCurrentIndex(0))
@@ -653,22 +646,12 @@ class GameWindow(QWidget):
     
     def start_game(self):
         """Начало игры"""
+        self.advance_timer.stop()
+        
         # Определяем выбранный язык
-        if self.lang_english.isChecked():
-            self.current_language = ('Английский', 'en', english_easy, english_medium, english_hard,
-                                    english_sentences, english_tests, english_easy, english_easy)
-        elif self.lang_italian.isChecked():
-            self.current_language = ('Итальянский', 'it', italian_easy, italian_medium, italian_hard,
-                                    italian_sentences, italian_tests, italian_easy, italian_easy)
-        elif self.lang_spanish.isChecked():
-            self.current_language = ('Испанский', 'es', spanish_easy, spanish_easy, spanish_easy,
-                                    english_sentences, english_tests, spanish_easy, spanish_easy)
-        elif self.lang_french.isChecked():
-            self.current_language = ('Французский', 'fr', french_easy, french_easy, french_easy,
-                                    english_sentences, english_tests, french_easy, french_easy)
-        else:
-            self.current_language = ('Португальский', 'pt', portuguese_easy, portuguese_easy, portuguese_easy,
-                                    english_sentences, english_tests, portuguese_easy, portuguese_easy)
+        for language_code, btn in self.language_buttons:
+            if btn.isChecked():
+                break
         
         # Определяем режим
         if self.mode_oral.isChecked():
@@ -677,8 +660,10 @@ class GameWindow(QWidget):
             self.current_mode = 2
         elif self.mode_test.isChecked():
             self.current_mode = 3
-        else:
+        elif self.mode_sentence.isChecked():
             self.current_mode = 4
+        else:
+            self.current_mode = 5
         
         # Определяем сложность
         if self.diff_easy.isChecked():
@@ -688,49 +673,33 @@ class GameWindow(QWidget):
         else:
             self.current_difficulty = 3
         
-        # Загружаем слова
-        self.load_words()
-        
-        # Сбрасываем счет
-        self.score = 0
-        self.lives = 3
-        self.current_word_index = 0
+        # Новая игра: слова, счет и жизни хранит сессия
+        self.session = GameSession(self.library, language_code, self.current_mode, self.session_length.value())
         self.waiting_for_next = False
         
         # Обновляем интерфейс
         self.update_game_display()
         
+        # Открываем микрофон и загружаем движок заранее, пока игрок читает задание
+        if self.current_mode == 1:
+            self.open_audio_capture()
+        
         # Переключаемся на экран игры
         self.stacked_widget.setCurrentIndex(1)
     
-    def load_words(self):
-        """Загрузка слов для текущего режима"""
-        language_name, code, easy, medium, hard, sentences, tests, writing, oral = self.current_language
-        
-        if self.current_difficulty == 1:
-            words_dict = easy
-        elif self.current_difficulty == 2:
-            words_dict = medium
-        else:
-            words_dict = hard
-        
-        if self.current_mode == 1:  # Устный
-            self.current_words = list(oral.items())
-        elif self.current_mode == 2:  # Письменный
-            self.current_words = list(writing.items())
-        elif self.current_mode == 3:  # Тесты
-            self.current_words = tests
-        else:  # Предложения
-            self.current_words = list(sentences.items())
-        
-        random.shuffle(self.current_words)
-    
     def update_game_display(self):
         """Обновление интерфейса игры"""
+        # Результаты распознавания для прошлого слова больше не нужны
+        self.cancel_recognition()
+        self.drill_timer.stop()
+        # Плашка с результатом относится к прошлому слову
+        self.feedback_label.setVisible(False)
+        
         # Обновляем счет и жизни
-        self.score_label.setText(f"Счет: {self.score}")
-        self.lives_label.setText(f"Жизни: {'❤️' * self.lives}")
-        self.progress_label.setText(f"Слово {self.current_word_index + 1}/{len(self.current_words)}")
+        session = self.session
+        self.score_label.setText(f"Счет: {session.score}")
+        self.lives_label.setText(f"Жизни: {'❤️' * session.lives}")
+        self.progress_label.setText(f"Слово {session.index + 1}/{len(session.words)}")
         
         # Показываем правильный режим ввода
         self.input_widget.setCurrentIndex(self.current_mode - 1)
@@ -739,21 +708,23 @@ class GameWindow(QWidget):
         
         # Показываем текущее задание
         if self.current_mode == 1:  # Устный
-            eng_word, ru_word = self.current_words[self.current_word_index]
+            eng_word, ru_word = session.current
             self.task_label.setText("Произнесите слово:")
             self.word_label.setText(f"🔤 {ru_word}")
             self.record_status.setText("")
             self.record_btn.setEnabled(True)
+            self.preload_sounds()
+            self.listen_btn.setEnabled(self.reference_audio(eng_word) is not None)
             
         elif self.current_mode == 2:  # Письменный
-            ru_word, eng_word = self.current_words[self.current_word_index]
+            ru_word, eng_word = session.current
             self.task_label.setText("Переведите слово:")
             self.word_label.setText(f"🔤 {ru_word}")
             self.answer_input.clear()
             self.answer_input.setFocus()
             
         elif self.current_mode == 3:  # Тесты
-            test = self.current_words[self.current_word_index]
+            test = session.current
             self.task_label.setText(test['question'])
             self.word_label.setText("")
             
@@ -770,98 +741,209 @@ class GameWindow(QWidget):
                 btn.setChecked(False)
             self.options_group.setExclusive(True)
             
-        else:  # Предложения
-            sentence, word = self.current_words[self.current_word_index]
+        elif self.current_mode == 4:  # Предложения
+            sentence, word = session.current
             self.task_label.setText("Закончите предложение:")
             self.word_label.setText(f"📝 {sentence}")
             self.sentence_input.clear()
             self.sentence_input.setFocus()
+            
+        else:  # Скоростной
+            ru_word, eng_word = session.current
+            self.task_label.setText("Переведите как можно быстрее:")
+            self.word_label.setText(f"⚡ {ru_word}")
+            self.drill_input.clear()
+            self.drill_input.setFocus()
+            self.start_drill_countdown()
+    
+    def reference_audio(self, word):
+        """Путь к записи произношения слова или None"""
+        if not self.sounds_available:
+            return None
+        return self.vocabulary_repository.audio_path(self.session.deck[0], word)
+    
+    def get_sound(self, path):
+        """Загруженная запись; давно не нужные выгружаются"""
+        if path in self.sounds:
+            self.sounds.move_to_end(path)
+            return self.sounds[path]
+        from PyQt5.QtCore import QUrl
+        from PyQt5.QtMultimedia import QSoundEffect
+        sound = QSoundEffect(self)
+        # Файл декодируется в память в фоне, play() потом начинается сразу
+        sound.setSource(QUrl.fromLocalFile(path))
+        self.sounds[path] = sound
+        while len(self.sounds) > SOUND_CACHE_SIZE:
+            self.sounds.popitem(last=False)[1].deleteLater()
+        return sound
+    
+    def preload_sounds(self):
+        """Заранее загрузить записи текущего и следующих слов раунда"""
+        session = self.session
+        try:
+            for eng_word, ru_word in session.words[session.index:session.index + SOUND_PRELOAD_AHEAD]:
+                path = self.reference_audio(eng_word)
+                if path is not None:
+                    self.get_sound(path)
+        except ImportError:
+            # Нет QtMultimedia или звуковой библиотеки: кнопка прослушивания недоступна
+            self.sounds_available = False
+    
+    def play_reference(self):
+        """Проиграть запись произношения текущего слова"""
+        path = self.reference_audio(self.session.expected)
+        if path is not None:
+            self.get_sound(path).play()
     
     def start_recording(self):
         """Начать запись голоса"""
+        try:
+            worker = self.get_speech_worker()
+        except Exception as e:
+            self.record_status.setText(f"❌ {str(e)}")
+            return
+        language_code = self.session.language[1]
+        if not worker.submit(self.request_id, f'{language_code}-{language_code.upper()}', self.session.vocabulary):
+            self.record_status.setText("⏳ Подождите, идет распознавание...")
+            return
+        
         self.record_btn.setEnabled(False)
         self.record_progress.setVisible(True)
         self.record_progress.setValue(0)
         self.record_status.setText("🎤 Говорите!")
-        
-        # Запускаем запись в отдельном потоке
-        self.record_thread = RecordThread()
-        self.record_thread.progress.connect(self.update_record_progress)
-        self.record_thread.finished.connect(self.recording_finished)
-        self.record_thread.start()
     
-    def update_record_progress(self, second):
+    def get_speech_worker(self):
+        """Постоянный поток распознавания, создается при первом обращении"""
+        if self.speech_worker is None:
+            from speech import SpeechWorker
+            self.speech_worker = SpeechWorker()
+            self.audio_capture = self.speech_worker.capture
+            self.speech_worker.progress.connect(self.update_record_progress)
+            self.speech_worker.recorded.connect(self.recording_finished)
+            self.speech_worker.finished.connect(self.speech_recognized)
+            self.speech_worker.start()
+        return self.speech_worker
+    
+    def cancel_recognition(self):
+        """Отменить незавершенные запросы распознавания"""
+        self.request_id += 1
+        if self.speech_worker is not None:
+            self.speech_worker.cancel(self.request_id)
+    
+    def open_audio_capture(self):
+        """Открыть микрофон на время устной игры"""
+        try:
+            language_code = self.session.language[1]
+            self.get_speech_worker().warm_up(f'{language_code}-{language_code.upper()}')
+            self.audio_capture.start()
+        except Exception as e:
+            self.record_status.setText(f"❌ {str(e)}")
+    
+    def close_audio_capture(self):
+        """Освободить микрофон"""
+        if self.audio_capture is not None:
+            self.audio_capture.stop()
+    
+    def shutdown(self):
+        """Остановка фоновых потоков при закрытии"""
+        self.cancel_recognition()
+        self.close_audio_capture()
+        if self.speech_worker is not None:
+            self.speech_worker.stop()
+            self.speech_worker = None
+    
+    def update_record_progress(self, request_id, percent):
         """Обновление прогресса записи"""
-        self.record_progress.setValue(second * 33)  # примерно 33% в секунду
+        if request_id == self.request_id:
+            self.record_progress.setValue(percent)
     
-    def recording_finished(self, filename):
+    def recording_finished(self, request_id):
         """Запись завершена"""
+        if request_id != self.request_id:
+            return
         self.record_progress.setVisible(False)
-        
-        if filename.startswith("ERROR"):
-            self.record_status.setText(f"❌ {filename[6:]}")
-            self.record_btn.setEnabled(True)
-        else:
-            self.record_status.setText("🔄 Распознаю речь...")
-            
-            # Распознаем речь в отдельном потоке
-            language_code = self.current_language[1]
-            self.speech_thread = SpeechThread(filename, f'{language_code}-{language_code.upper()}')
-            self.speech_thread.finished.connect(self.speech_recognized)
-            self.speech_thread.start()
+        self.record_status.setText("🔄 Распознаю речь...")
     
-    def speech_recognized(self, result):
+    def speech_recognized(self, request_id, candidates):
         """Речь распознана"""
-        if result.startswith("ERROR"):
-            self.record_status.setText(f"❌ {result[6:]}")
-            self.record_btn.setEnabled(True)
+        # Результат для предыдущего слова не применяем
+        if request_id != self.request_id:
             return
         
-        eng_word, ru_word = self.current_words[self.current_word_index]
+        self.record_progress.setVisible(False)
+        if isinstance(candidates, Exception):
+            self.record_status.setText(f"❌ {candidates}")
+            self.record_btn.setEnabled(True)
+            return
         
-        self.record_status.setText(f"📢 Вы сказали: '{result}'")
+        # Засчитываем лучшую из гипотез, при равенстве - более уверенную
+        text, grade = self.session.best_hypothesis(candidates)
+        self.record_status.setText(f"📢 Вы сказали: '{text}'")
+        self.show_grade(self.session.apply(grade))
+    
+    def show_grade(self, grade, details=""):
+        """Показать результат ответа, очки уже начислены сессией"""
+        correct_answer = self.session.expected
+        if grade == MATCH_EXACT:
+            self.show_feedback('success', f"✅ Правильно! +{POINTS[grade]} баллов{details}")
+        elif grade == MATCH_CLOSE:
+            self.show_feedback('almost', f"⚠️ Почти правильно! +{POINTS[grade]} баллов{details}. "
+                                         f"Правильно: {correct_answer}")
+        else:
+            self.show_feedback('error', f"❌ Неправильно! Правильно: {correct_answer}")
+        self.finish_answer(grade != MATCH_WRONG)
+    
+    def show_feedback(self, kind, text):
+        """Плашка с результатом ответа внутри экрана игры"""
+        colors = {
+            'success': ("#1e4d2b", "#2ecc71"),
+            'almost': ("#4d431e", "#f1c40f"),
+            'error': ("#4d1e1e", "#ff6b6b"),
+        }
+        background, border = colors[kind]
+        self.feedback_label.setStyleSheet(f"""
+            font-size: 16px;
+            font-weight: bold;
+            color: #e0e0e0;
+            background-color: {background};
+            border: 2px solid {border};
+            border-radius: 5px;
+            padding: 8px;
+            qproperty-alignment: AlignCenter;
+        """)
+        self.feedback_label.setText(text)
+        self.feedback_label.setVisible(True)
+        self.feedback_animation.stop()
+        self.feedback_animation.start()
+    
+    def finish_answer(self, correct):
+        """После ответа: обновить счет и перейти дальше по таймеру или по кнопке"""
+        self.waiting_for_next = True
+        self.score_label.setText(f"Счет: {self.session.score}")
+        self.lives_label.setText(f"Жизни: {'❤️' * self.session.lives}")
         
-        # Проверяем произношение
-        if result.lower() == eng_word.lower():
-            self.score += 10
-            QMessageBox.information(self, "Отлично!", f"✅ Правильно! +10 баллов")
-            # Автоматически переходим к следующему слову
-            self.next_word()
-        elif eng_word.lower() in result.lower() or result.lower() in eng_word.lower():
-            self.score += 5
-            QMessageBox.information(self, "Почти!", f"⚠️ Почти правильно! +5 баллов\nПравильно: {eng_word}")
-            # Автоматически переходим к следующему слову
-            self.next_word()
+        if self.auto_advance.isChecked():
+            # На ошибку даем больше времени, чтобы прочитать правильный ответ
+            self.advance_timer.start(AUTO_ADVANCE_DELAY if correct else AUTO_ADVANCE_DELAY * 2)
         else:
-            self.lives -= 1
-            QMessageBox.warning(self, "Ошибка!", f"❌ Неправильно!\nПравильно: {eng_word}")
-            
-            if self.lives <= 0:
-                self.game_over()
-            else:
-                # Автоматически переходим к следующему слову
-                self.next_word()
+            self.next_btn.setVisible(True)
+            self.next_btn.setFocus()
+    
+    def advance(self):
+        """Переход дальше после ответа"""
+        self.advance_timer.stop()
+        self.next_btn.setVisible(False)
+        if self.session.lost:
+            self.game_over()
+        else:
+            self.next_word()
     
     def check_writing_answer(self):
         """Проверка письменного ответа"""
         if self.waiting_for_next:
             return
             
-        ru_word, eng_word = self.current_words[self.current_word_index]
-        answer = self.answer_input.text().lower().strip()
-        
-        if answer == eng_word:
-            self.score += 10
-            QMessageBox.information(self, "Отлично!", f"✅ Правильно! +10 баллов")
-            self.next_word()
-        else:
-            self.lives -= 1
-            QMessageBox.warning(self, "Ошибка!", f"❌ Неправильно!\nПравильно: {eng_word}")
-            
-            if self.lives <= 0:
-                self.game_over()
-            else:
-                self.next_word()
+        self.show_grade(self.session.answer(self.answer_input.text()))
     
     def check_test_answer(self):
         """Проверка ответа в тесте"""
@@ -870,75 +952,90 @@ class GameWindow(QWidget):
             
         checked_id = self.options_group.checkedId()
         if checked_id == -1:
-            QMessageBox.warning(self, "Ошибка!", "Выберите ответ!")
+            self.show_feedback('almost', "Выберите ответ!")
             return
         
-        test = self.current_words[self.current_word_index]
-        answer = self.option_buttons[checked_id].text()
-        
-        if answer == test['answer']:
-            self.score += 10
-            QMessageBox.information(self, "Отлично!", f"✅ Правильно! +10 баллов")
-            self.next_word()
-        else:
-            self.lives -= 1
-            QMessageBox.warning(self, "Ошибка!", f"❌ Неправильно!\nПравильно: {test['answer']}")
-            
-            if self.lives <= 0:
-                self.game_over()
-            else:
-                self.next_word()
+        self.show_grade(self.session.answer(self.option_buttons[checked_id].text()))
     
     def check_sentence_answer(self):
         """Проверка ответа в предложении"""
         if self.waiting_for_next:
             return
             
-        sentence, correct_word = self.current_words[self.current_word_index]
-        answer = self.sentence_input.text().lower().strip()
+        self.show_grade(self.session.answer(self.sentence_input.text()))
+    
+    def start_drill_countdown(self):
+        """Запустить отсчет времени на ответ"""
+        self.drill_limit = self.session.time_limit()
+        self.drill_started = time.monotonic()
+        self.drill_countdown.setRange(0, int(self.drill_limit * 1000))
+        self.drill_countdown.setValue(int(self.drill_limit * 1000))
+        self.drill_countdown.setFormat(f"⏱️ {self.drill_limit:.1f} с")
+        self.drill_timer.start()
+    
+    def update_drill_countdown(self):
+        """Обновить полосу оставшегося времени"""
+        remaining = self.drill_limit - (time.monotonic() - self.drill_started)
+        if remaining <= 0:
+            self.drill_timeout()
+            return
+        self.drill_countdown.setValue(int(remaining * 1000))
+        self.drill_countdown.setFormat(f"⏱️ {remaining:.1f} с")
+    
+    def drill_timeout(self):
+        """Время на ответ вышло"""
+        self.drill_timer.stop()
+        if self.waiting_for_next:
+            return
+        self.drill_countdown.setValue(0)
+        self.session.apply(MATCH_WRONG)
+        self.show_feedback('error', f"⏰ Время вышло! Правильно: {self.session.expected}")
+        self.finish_answer(False)
+    
+    def check_drill_answer(self):
+        """Проверка ответа в скоростном режиме"""
+        if self.waiting_for_next:
+            return
         
-        if answer == correct_word:
-            self.score += 10
-            QMessageBox.information(self, "Отлично!", f"✅ Правильно! +10 баллов")
-            self.next_word()
-        else:
-            self.lives -= 1
-            QMessageBox.warning(self, "Ошибка!", f"❌ Неправильно!\nПравильно: {correct_word}")
-            
-            if self.lives <= 0:
-                self.game_over()
-            else:
-                self.next_word()
+        # Монотонные часы не зависят от перевода системного времени
+        elapsed = time.monotonic() - self.drill_started
+        self.drill_timer.stop()
+        
+        grade = self.session.answer(self.drill_input.text(), elapsed)
+        self.show_grade(grade, f" ({elapsed:.1f} с)")
     
     def next_word(self):
         """Переход к следующему слову"""
         self.waiting_for_next = True
-        self.current_word_index += 1
+        self.session.advance()
         
-        if self.current_word_index >= len(self.current_words):
+        if self.session.finished:
             self.game_finished()
         else:
             self.update_game_display()
     
     def game_over(self):
         """Игра окончена (проигрыш)"""
-        QMessageBox.critical(self, "Game Over!", f"💀 Вы проиграли!\nСчет: {self.score}")
+        self.cancel_recognition()
+        self.close_audio_capture()
+        QMessageBox.critical(self, "Game Over!", f"💀 Вы проиграли!\nСчет: {self.session.score}")
         self.save_stats()
         self.stacked_widget.setCurrentIndex(0)
     
     def game_finished(self):
         """Игра успешно завершена"""
-        max_score = len(self.current_words) * 10
-        percent = (self.score / max_score) * 100 if max_score > 0 else 0
+        self.close_audio_capture()
+        score, max_score = self.session.score, self.session.max_score
+        percent = (score / max_score) * 100 if max_score > 0 else 0
         
         if percent >= 80:
-            message = f"🏆 Отлично! Счет: {self.score}/{max_score}"
+            message = f"🏆 Отлично! Счет: {score}/{max_score}"
         elif percent >= 60:
-            message = f"👍 Хорошо! Счет: {self.score}/{max_score}"
+            message = f"👍 Хорошо! Счет: {score}/{max_score}"
         elif percent >= 40:
-            message = f"💪 Неплохо! Счет: {self.score}/{max_score}"
+            message = f"💪 Неплохо! Счет: {score}/{max_score}"
         else:
-            message = f"🚀 Тренируйся! Счет: {self.score}/{max_score}"
+            message = f"🚀 Тренируйся! Счет: {score}/{max_score}"
         
         QMessageBox.information(self, "Игра завершена!", message)
         self.save_stats()
@@ -946,47 +1043,61 @@ class GameWindow(QWidget):
     
     def save_stats(self):
         """Сохранение статистики"""
-        language_name = self.current_language[0]
-        
-        mode_names = ["Устный", "Письменный", "Тест", "Предложения"]
-        mode_name = mode_names[self.current_mode - 1]
-        
-        self.stats.append({
-            'date': datetime.now().strftime("%d.%m.%Y %H:%M"),
-            'language': language_name,
-            'mode': mode_name,
-            'score': self.score,
-            'total': len(self.current_words) * 10
-        })
+        self.session.save_stats()
     
     def show_stats(self):
         """Показать статистику"""
-        if not self.stats:
-            self.stats_text.setText("📊 Пока нет сыгранных игр")
-        else:
-            text = ""
-            total_score = 0
-            games_played = len(self.stats)
-            
-            for stat in self.stats:
-                text += f"\n📅 {stat['date']}\n"
-                text += f"   Язык: {stat['language']}\n"
-                text += f"   Режим: {stat['mode']}\n"
-                text += f"   Счет: {stat['score']}/{stat['total']}\n"
-                text += "-" * 40 + "\n"
-                total_score += stat['score']
-            
-            text += f"\n📊 ВСЕГО:\n"
-            text += f"   Игр сыграно: {games_played}\n"
-            text += f"   Общий счет: {total_score}\n"
-            text += f"   Средний счет: {total_score/games_played:.1f}"
-            
-            self.stats_text.setText(text)
-        
+        # Из меню статистику можно открыть посреди игры: игра останавливается
+        self.leave_game()
+        
+        # Список языков в фильтре берется из итогов, без чтения истории
+        selected = self.stats_language.currentData()
+        self.stats_language.blockSignals(True)
+        self.stats_language.clear()
+        self.stats_language.addItem("Все языки", "")
+        for language in self.stats_store.languages():
+            self.stats_language.addItem(language, language)
+        self.stats_language.setCurrentIndex(max(0, self.stats_language.findData(selected)))
+        self.stats_language.blockSignals(False)
+        
+        self.apply_stats_filters()
         self.stacked_widget.setCurrentIndex(2)
     
+    def stats_filters(self):
+        """Фильтры истории из виджетов экрана статистики"""
+        filters = {
+            'language': self.stats_language.currentData(),
+            'mode': self.stats_mode.currentData(),
+        }
+        if self.stats_date_from.date() != self.stats_date_from.minimumDate():
+            filters['date_from'] = self.stats_date_from.date().toPyDate()
+        if self.stats_date_to.date() != self.stats_date_to.minimumDate():
+            filters['date_to'] = self.stats_date_to.date().toPyDate()
+        return filters
+    
+    def apply_stats_filters(self):
+        """Перечитать историю и итоги с текущими фильтрами"""
+        filters = self.stats_filters()
+        self.stats_model.set_filters(filters)
+        
+        games_played, total_score = self.stats_store.summary(filters)
+        if not games_played:
+            self.stats_summary.setText("📊 Пока нет сыгранных игр")
+        else:
+            self.stats_summary.setText(f"📊 Игр сыграно: {games_played}   "
+                                       f"Общий счет: {total_score}   "
+                                       f"Средний счет: {total_score/games_played:.1f}")
+    
+    def leave_game(self):
+        """Уход с экрана игры: таймеры, распознавание и микрофон останавливаются"""
+        self.advance_timer.stop()
+        self.drill_timer.stop()
+        self.cancel_recognition()
+        self.close_audio_capture()
+    
     def back_to_menu(self):
         """Возврат в меню"""
+        self.leave_game()
         self.stacked_widget.setCurrentIndex(0)
 
 class PolyglotGame(QMainWindow):
@@ -1000,6 +1111,7 @@ class PolyglotGame(QMainWindow):
         # Центральный виджет
         central_widget = GameWindow()
         self.setCentralWidget(central_widget)
+        self.game_window = central_widget
         
         # Меню
         menubar = self.menuBar()
@@ -1026,6 +1138,11 @@ class PolyglotGame(QMainWindow):
         about_action.triggered.connect(self.show_about)
         help_menu.addAction(about_action)
     
+    def closeEvent(self, event):
+        """Закрытие окна"""
+        self.game_window.shutdown()
+        super().closeEvent(event)
+    
     def show_about(self):
         """Показать информацию о программе"""
         QMessageBox.about(self, "О программе",
@@ -1042,7 +1159,8 @@ class PolyglotGame(QMainWindow):
                          "🗣️ Устный\n"
                          "✍️ Письменный\n"
                          "📝 Тесты\n"
-                         "🔤 Закончить предложение")
+                         "🔤 Закончить предложение\n"
+                         "⚡ Скоростной")
 
 def main():
     app = QApplication(sys.argv)
@@ -0,0 +1,194 @@
+"""Проверка произношения по папке WAV-файлов без окна игры.
+
+    python finish/grade.py recordings/ --language en --output results.csv [--manifest words.csv]
+
+Ожидаемое слово берется из manifest (CSV со столбцами file,word, путь относительно
+папки) или из имени файла после последнего '_': ivanov_apple.wav -> apple.
+Файлы распознаются в пуле процессов по числу доступных ядер, движок распознавания
+загружается один раз в каждом процессе. Оценка та же, что в устном режиме.
+Результаты дописываются в CSV или JSONL (по расширению) по мере готовности;
+уже проверенные файлы при повторном запуске пропускаются. Файлы со сбоем
+(ошибка сервиса, чтения, нечитаемый WAV) проверяются снова, в выводе у такого
+файла будет несколько строк - действует последняя.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+from matching import MatchIndex
+from session import POINTS
+from vocabulary import VocabularyRepository
+
+FIELDS = ['file', 'expected', 'heard', 'confidence', 'grade', 'points', 'error']
+
+# Сколько файлов держать в работе на один процесс
+QUEUE_PER_WORKER = 4
+
+# Движок и варианты слов в процессе-обработчике, загружаются один раз
+_backend = None
+_index = None
+
+
+def available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def wav_files(root):
+    """WAV-файлы папки и подпапок, пути относительно root, без чтения списка целиком"""
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    stack.append(entry.path)
+                elif entry.name.lower().endswith('.wav'):
+                    yield os.path.relpath(entry.path, root)
+
+
+def word_from_name(path):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return stem.rsplit('_', 1)[-1].replace('-', ' ')
+
+
+def read_manifest(path):
+    with open(path, encoding='utf-8', newline='') as f:
+        return {row['file']: row['word'] for row in csv.DictReader(f)}
+
+
+def init_worker(code, variants, words):
+    global _backend, _index
+    try:
+        from recognition import get_backend
+        _backend = get_backend(f'{code}-{code.upper()}')
+    except Exception as e:
+        # Без движка процесс бесполезен: короткое сообщение вместо traceback,
+        # пул остановится, и main объяснит, что делать
+        print(f"Не удалось загрузить распознавание для '{code}': {e}", file=sys.stderr, flush=True)
+        os._exit(1)
+    # Другое слово словаря (ragazza вместо ragazzo) - ошибка, а не опечатка
+    _index = MatchIndex([], code, variants, words)
+
+
+def grade_file(root, path, word):
+    """Строка результата для одного файла"""
+    from audio import read_wav, resample, RECOGNIZER_SAMPLE_RATE
+    from recognition import RecognitionError, ServiceError
+    row = dict.fromkeys(FIELDS, '')
+    row.update(file=path, expected=word, grade=0, points=0)
+    try:
+        samples, sample_rate = read_wav(os.path.join(root, path))
+        candidates = _backend.recognize(resample(samples, sample_rate), RECOGNIZER_SAMPLE_RATE)
+    except (ServiceError, ValueError, OSError) as e:
+        # Сбой, а не оценка: при следующем запуске файл проверяется снова
+        row['error'] = str(e)
+        return row
+    except RecognitionError:
+        # Речь не распознана - это результат проверки: 0 баллов
+        return row
+    # Те же правила, что в устном режиме: лучшая гипотеза, при равенстве - более уверенная
+    text, grade, confidence = _index.rank(word, candidates)[0]
+    row.update(heard=text, confidence=round(confidence, 3), grade=grade, points=POINTS[grade])
+    return row
+
+
+class ResultWriter:
+    """Дописывает строки в CSV или JSONL и помнит уже проверенные файлы.
+
+    Проверенным считается файл, у которого есть строка без ошибки.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.jsonl = path.endswith('.jsonl')
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, encoding='utf-8', newline='') as f:
+                rows = (json.loads(line) for line in f if line.strip()) if self.jsonl else csv.DictReader(f)
+                self.done = {row['file'] for row in rows if not row['error']}
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, 'a', encoding='utf-8', newline='')
+        self.csv = None
+        if not self.jsonl:
+            self.csv = csv.DictWriter(self.file, FIELDS)
+            if new_file:
+                self.csv.writeheader()
+
+    def write(self, row):
+        if self.jsonl:
+            self.file.write(json.dumps(row, ensure_ascii=False) + '\n')
+        else:
+            self.csv.writerow(row)
+        # Строка на диске сразу: прерванную проверку можно продолжить
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Проверка произношения по папке WAV-файлов")
+    parser.add_argument('folder', help="папка с записями")
+    parser.add_argument('--language', required=True, help="код языка, например en")
+    parser.add_argument('--output', required=True, help="results.csv или results.jsonl")
+    parser.add_argument('--manifest', help="CSV со столбцами file,word")
+    parser.add_argument('--workers', type=int, default=available_cores(), help="число процессов")
+    args = parser.parse_args()
+
+    manifest = read_manifest(args.manifest) if args.manifest else None
+    repository = VocabularyRepository()
+    variants = repository.language(args.language).get('variants', {})
+    words = repository.deck_words(args.language)
+    writer = ResultWriter(args.output)
+    started = time.monotonic()
+    graded = skipped = errors = 0
+    pending = set()
+
+    def record(futures):
+        nonlocal graded, errors
+        for future in futures:
+            row = future.result()
+            writer.write(row)
+            graded += 1
+            errors += bool(row['error'])
+        elapsed = time.monotonic() - started
+        print(f"\rПроверено: {graded}, {graded / elapsed:.1f} файлов/с", end='', flush=True)
+
+    try:
+        with ProcessPoolExecutor(args.workers, initializer=init_worker,
+                                 initargs=(args.language, variants, words)) as executor:
+            for path in wav_files(args.folder):
+                if path in writer.done:
+                    skipped += 1
+                    continue
+                word = manifest.get(path) if manifest is not None else word_from_name(path)
+                if not word:
+                    continue
+                # Список файлов читается по мере обработки, в работе ограниченное число
+                if len(pending) >= args.workers * QUEUE_PER_WORKER:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    record(finished)
+                pending.add(executor.submit(grade_file, args.folder, path, word))
+            record(pending)
+    except BrokenProcessPool:
+        sys.exit(f"\nПроверка остановлена: процесс распознавания завершился с ошибкой (см. выше). "
+                 f"Проверено файлов: {graded}; повторный запуск продолжит с места остановки.")
+    finally:
+        writer.close()
+
+    elapsed = time.monotonic() - started
+    print(f"\nПроверено файлов: {graded}, пропущено уже проверенных: {skipped}, "
+          f"{graded / elapsed if elapsed else 0:.1f} файлов/с на {args.workers} процессах")
+    if errors:
+        print(f"С ошибкой: {errors}, они будут проверены снова при следующем запуске")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""Нагрузочный тест сервера POLYGLOT (server.py).
+
+    python finish/loadtest.py [--clients 10,30,100,300] [--duration 5] [--think 5]
+
+Сервер запускается в отдельном процессе с временной папкой пользователя.
+Для каждого числа одновременных клиентов они играют без пауз duration секунд,
+считаются запросы в секунду и задержка. Сервер разбирает запросы в цикле asyncio,
+а правила и запись в базу выполняет в одном потоке базы, так что из-за GIL
+предельная пропускная способность - это возможности одного ядра; число игроков
+на ядро оценивается как запросы в секунду * think (секунд между ответами игрока).
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import asyncio
+import argparse
+import tempfile
+import tracemalloc
+import subprocess
+
+from stats import percentile
+
+FINISH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Задержка, при которой игра еще ощущается мгновенной, с
+LATENCY_BUDGET = 0.1
+
+
+class Client:
+    """HTTP-клиент с одним keep-alive соединением"""
+
+    def __init__(self, port):
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, body=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection('127.0.0.1', self.port)
+        payload = json.dumps(body).encode('utf-8') if body is not None else b''
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+                          f"Content-Length: {len(payload)}\r\n\r\n".encode('latin-1') + payload)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.lower() == 'content-length':
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def make_answer(game):
+    """Ответ игрока: в тесте случайный вариант, в остальных режимах - наугад"""
+    task = game['task']
+    if 'options' in task:
+        return random.choice(task['options'])
+    return random.choice(['кот', 'book', 'дом', 'blue'])
+
+
+async def play(port, deadline, latencies, languages, learner):
+    """Играть новыми играми до deadline, записывая задержку каждого запроса"""
+    client = Client(port)
+    try:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            status, game = await client.request('POST', '/sessions', {
+                'learner': learner, 'language': random.choice(languages),
+                'mode': random.choice([2, 3, 4]), 'count': 10})
+            latencies.append(time.perf_counter() - started)
+            while not game['over'] and time.perf_counter() < deadline:
+                started = time.perf_counter()
+                status, game = await client.request('POST', f"/sessions/{game['id']}/answer",
+                                                    {'answer': make_answer(game)})
+                latencies.append(time.perf_counter() - started)
+    finally:
+        client.close()
+
+
+async def run_level(port, clients, duration, languages):
+    latencies = []
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(play(port, deadline, latencies, languages, f'learner-{number}')
+                           for number in range(clients)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'clients': clients,
+        'requests_per_second': len(latencies) / elapsed,
+        'p50': percentile(latencies, 0.5),
+        'p95': percentile(latencies, 0.95),
+    }
+
+
+def session_memory(home, count=1000):
+    """Средний размер игры в памяти, байт (словари и банк слов общие).
+
+    Базы создаются в папке home: USER_DIR уже задан при импорте и указывает на ~/.polyglot.
+    """
+    from session import Library, GameSession
+    from stats import StatsStore
+    from wordbank import WordBank
+    library = Library(word_bank=WordBank(os.path.join(home, 'wordbank.sqlite3')),
+                      stats_store=StatsStore(os.path.join(home, 'stats.sqlite3')))
+    GameSession(library, 'en', 2, learner='learner')
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    sessions = [GameSession(library, 'en', random.choice([2, 3, 4]), learner='learner') for _ in range(count)]
+    size = (tracemalloc.get_traced_memory()[0] - before) / len(sessions)
+    tracemalloc.stop()
+    return size
+
+
+def start_server(env):
+    """Сервер на свободном порту, возвращает (процесс, порт)"""
+    process = subprocess.Popen([sys.executable, os.path.join(FINISH_DIR, 'server.py'), '--port', '0'],
+                               stdout=subprocess.PIPE, text=True, env=env)
+    line = process.stdout.readline()
+    if not line:
+        process.wait()
+        sys.exit("Сервер не запустился")
+    return process, int(line.rsplit(':', 1)[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест сервера POLYGLOT")
+    parser.add_argument('--clients', default='10,30,100,300', help="числа одновременных клиентов")
+    parser.add_argument('--duration', type=float, default=5.0, help="секунд на каждый уровень")
+    parser.add_argument('--think', type=float, default=5.0, help="секунд между ответами игрока")
+    parser.add_argument('--output', help="куда сохранить результаты в JSON")
+    args = parser.parse_args()
+
+    home = tempfile.mkdtemp(prefix='polyglot-load-')
+    env = dict(os.environ, POLYGLOT_HOME=home)
+    process, port = start_server(env)
+    try:
+        from vocabulary import VocabularyRepository
+        languages = [code for code, language in VocabularyRepository().languages()]
+        results = {'session_bytes': session_memory(tempfile.mkdtemp(dir=home)), 'levels': []}
+        print(f"Игра в памяти: {results['session_bytes'] / 1024:.1f} КБ")
+        for clients in (int(value) for value in args.clients.split(',')):
+            level = asyncio.run(run_level(port, clients, args.duration, languages))
+            results['levels'].append(level)
+            print(f"{clients:5d} клиентов: {level['requests_per_second']:8.0f} запросов/с, "
+                  f"p50 {level['p50'] * 1000:.1f} мс, p95 {level['p95'] * 1000:.1f} мс")
+
+        # Пропускная способность, при которой задержка еще в пределах бюджета
+        usable = [level['requests_per_second'] for level in results['levels'] if level['p95'] <= LATENCY_BUDGET]
+        capacity = max(usable) if usable else min(level['requests_per_second'] for level in results['levels'])
+        results['sessions_per_core'] = int(capacity * args.think)
+        print(f"При ответе раз в {args.think:g} с одно ядро выдержит около "
+              f"{results['sessions_per_core']} игроков (p95 <= {LATENCY_BUDGET * 1000:.0f} мс)")
+
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=4)
+    finally:
+        process.terminate()
+        process.wait()
+        shutil.rmtree(home, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Сборка пакета записей произношения офлайн-синтезатором речи espeak-ng.
+
+    python finish/make_audio.py [--language en] [--force]
+
+Для каждого слова наборов языка создается data/<код>/audio/<слово>.wav (имя в
+нижнем регистре), который проигрывает кнопка «Послушать» в устном режиме. Готовые файлы не перезаписываются
+без --force; записи диктора можно положить туда же вместо синтезированных.
+"""
+import os
+import sys
+import shutil
+import argparse
+import subprocess
+
+from vocabulary import VocabularyRepository
+
+
+def synthesize(word, code, path, speed):
+    """Записать слово в WAV, True при успехе"""
+    result = subprocess.run(['espeak-ng', '-v', code, '-s', str(speed), '-w', path, word],
+                            capture_output=True)
+    return result.returncode == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Записи произношения для устного режима")
+    parser.add_argument('--language', action='append', help="код языка, по умолчанию все")
+    parser.add_argument('--speed', type=int, default=140, help="слов в минуту")
+    parser.add_argument('--force', action='store_true', help="перезаписать готовые файлы")
+    args = parser.parse_args()
+
+    if shutil.which('espeak-ng') is None:
+        sys.exit("Не найден espeak-ng: установите его, например apt install espeak-ng")
+
+    repository = VocabularyRepository()
+    codes = args.language or [code for code, language in repository.languages()]
+    for code in codes:
+        folder = os.path.join(repository.root, code, 'audio')
+        os.makedirs(folder, exist_ok=True)
+        created = failed = 0
+        for word in sorted(repository.deck_words(code)):
+            # Имя файла то же, по которому ищет запись кнопка «Послушать»
+            path = repository.audio_file(code, word)
+            if os.path.exists(path) and not args.force:
+                continue
+            if synthesize(word, code, path, args.speed):
+                created += 1
+            else:
+                failed += 1
+        print(f"{code}: создано {created}, с ошибкой {failed}")
+
+
+if __name__ == '__main__':
+    main()
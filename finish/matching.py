@@ -0,0 +1,171 @@
+import re
+import unicodedata
+
+# Результат сравнения ответа с правильным
+MATCH_WRONG = 0
+MATCH_CLOSE = 1  # опечатка, похожее звучание или лишние слова
+MATCH_EXACT = 2  # совпадение с точностью до регистра и диакритики
+
+# Правила фонетических ключей: (регулярное выражение, замена) по кодам языков
+PHONETIC_RULES = {
+    'en': [(r'ph', 'f'), (r'ck', 'k'), (r'c(?=[eiy])', 's'), (r'c', 'k'), (r'q', 'k'),
+           (r'x', 'ks'), (r'wh', 'w'), (r'kn', 'n'), (r'(?<=.)e$', '')],
+    'it': [(r'ch', 'k'), (r'gh', 'g'), (r'gli', 'li'), (r'gn', 'ni'), (r'c(?=[ei])', 'ch'),
+           (r'c', 'k'), (r'q', 'k'), (r'h', '')],
+    'es': [(r'qu', 'k'), (r'c(?=[ei])', 's'), (r'c', 'k'), (r'z', 's'), (r'v', 'b'),
+           (r'll', 'y'), (r'h', '')],
+    'fr': [(r'eau', 'o'), (r'au', 'o'), (r'ph', 'f'), (r'qu', 'k'), (r'c(?=[eiy])', 's'),
+           (r'c', 'k'), (r'(?<=.)[estx]+$', '')],
+    'pt': [(r'lh', 'li'), (r'nh', 'ni'), (r'qu', 'k'), (r'c(?=[ei])', 's'), (r'c', 'k'),
+           (r'ss', 's'), (r'h', '')],
+    'ru': [(r'ё', 'е'), (r'[ъь]', ''), (r'тс', 'ц'), (r'(?<=.)о', 'а')],
+}
+
+_compiled_rules = {}
+
+
+def normalize(text):
+    """Нижний регистр, без диакритики у латиницы, без лишних пробелов и знаков"""
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    chars = []
+    for char in decomposed:
+        # Диакритику снимаем только с латиницы: «й» и «ё» остаются буквами
+        if unicodedata.combining(char) and chars and chars[-1] < 'ɐ':
+            continue
+        chars.append(char)
+    text = unicodedata.normalize('NFC', ''.join(chars)).replace('ё', 'е')
+    text = re.sub(r"[^\w\s'-]", '', text)
+    return ' '.join(text.split())
+
+
+def phonetic_key(text, language):
+    """Упрощенный ключ звучания для языка; без правил - нормализованная форма"""
+    if language not in _compiled_rules:
+        _compiled_rules[language] = [(re.compile(pattern), replacement)
+                                     for pattern, replacement in PHONETIC_RULES.get(language, [])]
+    key = normalize(text)
+    for pattern, replacement in _compiled_rules[language]:
+        key = pattern.sub(replacement, key)
+    # Двойные буквы звучат как одна
+    return re.sub(r'(.)\1+', r'\1', key)
+
+
+def bounded_distance(a, b, limit):
+    """Расстояние Дамерау-Левенштейна с выходом, как только оно больше limit.
+
+    Считается только полоса шириной 2 * limit + 1 вокруг диагонали.
+    """
+    if a == b:
+        return 0
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    over = limit + 1
+    previous_previous = None
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [over] * (len(b) + 1)
+        if i <= limit:
+            current[0] = i
+        row_min = current[0]
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+            # Перестановка соседних букв считается одной ошибкой
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous_previous[j - 2] + 1)
+            current[j] = value if value < over else over
+            row_min = min(row_min, current[j])
+        if row_min > limit:
+            return over
+        previous_previous, previous = previous, current
+    return min(previous[-1], over)
+
+
+# В словах такой длины замена буквы обычно дает другое слово (cat - car),
+# поэтому прощается только лишняя буква: «cats» вместо «cat»
+SHORT_WORD = 3
+
+
+def allowed_typos(word):
+    """Сколько опечаток прощается в слове такой длины"""
+    if len(word) <= 2:
+        return 0
+    if len(word) <= 7:
+        return 1
+    return 2
+
+
+class MatchIndex:
+    """Заранее посчитанные формы ответов набора для быстрой проверки.
+
+    variants - принятые варианты написания: {ответ: [вариант, ...]}.
+    others - другие слова набора: ответ, совпадающий с любым из них
+    или с другим ответом раунда, - ошибка, а не опечатка.
+    """
+
+    def __init__(self, answers, language, variants=None, others=()):
+        self.language = language
+        self.variants = variants or {}
+        self.forms = {}
+        self.words = {normalize(word) for word in others}
+        for answer in answers:
+            self.add(answer)
+
+    def add(self, answer):
+        forms = []
+        for text in [answer, *self.variants.get(answer, [])]:
+            normalized = normalize(text)
+            forms.append((normalized, phonetic_key(text, self.language), allowed_typos(normalized)))
+            self.words.add(normalized)
+        self.forms[answer] = forms
+
+    def grade(self, forms, given):
+        """Оценка нормализованного ответа по всем вариантам сразу"""
+        if not given:
+            return MATCH_WRONG
+        if any(given == normalized for normalized, form_key, typos in forms):
+            return MATCH_EXACT
+        # Другое слово раунда или набора: «car» вместо «cat» - не опечатка
+        if given in self.words:
+            return MATCH_WRONG
+        best = MATCH_WRONG
+        key = None
+        for normalized, form_key, typos in forms:
+            if best == MATCH_CLOSE:
+                break
+            if (typos and (len(normalized) > SHORT_WORD or len(given) > len(normalized))
+                    and bounded_distance(given, normalized, typos) <= typos):
+                best = MATCH_CLOSE
+                continue
+            if key is None:
+                key = phonetic_key(given, self.language)
+            if key == form_key:
+                best = MATCH_CLOSE
+            # Правильное слово внутри более длинной фразы
+            elif ' ' in given and normalized in given.split():
+                best = MATCH_CLOSE
+        return best
+
+    def match(self, answer, given):
+        """Оценка ответа given для правильного ответа answer"""
+        if answer not in self.forms:
+            self.add(answer)
+        return self.grade(self.forms[answer], normalize(given))
+
+    def rank(self, answer, candidates):
+        """Гипотезы распознавания [(текст, уверенность)] по убыванию оценки, затем уверенности.
+
+        Одинаковые после нормализации гипотезы оцениваются один раз.
+        Возвращает [(текст, оценка, уверенность)].
+        """
+        if answer not in self.forms:
+            self.add(answer)
+        forms = self.forms[answer]
+        grades = {}
+        ranked = []
+        for text, confidence in candidates:
+            given = normalize(text)
+            if given not in grades:
+                grades[given] = self.grade(forms, given)
+            ranked.append((text, grades[given], confidence))
+        ranked.sort(key=lambda item: (item[1], item[2]), reverse=True)
+        return ranked
@@ -0,0 +1,293 @@
+import os
+import json
+import hashlib
+import threading
+
+import numpy as np
+import speech_recognition as sr
+
+from wordbank import user_path
+
+# Папка с офлайн-моделями Vosk: models/<код языка>/ (например models/en)
+MODELS_DIR = os.environ.get('POLYGLOT_MODELS_DIR',
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models'))
+
+
+class RecognitionError(Exception):
+    """Ошибка распознавания с текстом для пользователя"""
+
+
+class ServiceError(RecognitionError):
+    """Сервис распознавания недоступен; повтор может помочь"""
+
+
+class RecognizerBackend:
+    """Базовый движок распознавания речи"""
+    name = None
+    max_alternatives = 5
+    # Ограничивает ли словарь сессии сам поиск (грамматика), а не только порядок гипотез
+    uses_grammar = False
+
+    def __init__(self, language_code):
+        self.language_code = language_code
+
+    @classmethod
+    def available(cls, language_code):
+        """Можно ли использовать движок для языка"""
+        return True
+
+    def recognize(self, samples, sample_rate, vocabulary=None):
+        """Распознать int16 моно-сигнал.
+
+        Возвращает список (текст, уверенность) по убыванию уверенности.
+        vocabulary - слова текущей сессии, если движок умеет ими ограничиваться.
+        """
+        raise NotImplementedError
+
+
+class GoogleBackend(RecognizerBackend):
+    """Онлайн-распознавание через Google Web Speech API"""
+    name = 'google'
+
+    def __init__(self, language_code):
+        super().__init__(language_code)
+        self.recognizer = sr.Recognizer()
+
+    def recognize(self, samples, sample_rate, vocabulary=None):
+        # int16 моно: 2 байта на сэмпл, memoryview без копирования
+        audio = sr.AudioData(memoryview(np.ascontiguousarray(samples)).cast('B'), sample_rate, 2)
+        try:
+            result = self.recognizer.recognize_google(audio, language=self.language_code, show_all=True)
+        except sr.RequestError:
+            raise ServiceError("Ошибка сервиса")
+        # Без результата Google возвращает пустой список
+        alternatives = result.get('alternative', []) if isinstance(result, dict) else []
+        if not alternatives:
+            raise RecognitionError("Не удалось распознать речь")
+        # Уверенность Google отдает только для первой гипотезы
+        candidates = [(alt['transcript'].lower(), alt.get('confidence', 0.0))
+                      for alt in alternatives[:self.max_alternatives]]
+        return rank_candidates(candidates, vocabulary)
+
+
+class VoskBackend(RecognizerBackend):
+    """Офлайн-распознавание через Vosk, модель загружается один раз"""
+    name = 'vosk'
+    uses_grammar = True
+
+    def __init__(self, language_code):
+        super().__init__(language_code)
+        import vosk
+        vosk.SetLogLevel(-1)
+        self.vosk = vosk
+        self.model = vosk.Model(self.model_path(language_code))
+        self.recognizer_key = None
+        self.recognizer = None
+
+    @staticmethod
+    def model_path(language_code):
+        return os.path.join(MODELS_DIR, language_code.split('-')[0])
+
+    @classmethod
+    def available(cls, language_code):
+        if not os.path.isdir(cls.model_path(language_code)):
+            return False
+        try:
+            import vosk
+        except ImportError:
+            return False
+        return True
+
+    def get_recognizer(self, sample_rate, vocabulary):
+        """Распознаватель с грамматикой из слов сессии, переиспользуется между раундами"""
+        key = (sample_rate, tuple(vocabulary) if vocabulary else None)
+        if key != self.recognizer_key:
+            if vocabulary:
+                # Поиск ключевых слов: только слова сессии плюс «неизвестное»
+                grammar = json.dumps(sorted(set(vocabulary)) + ['[unk]'], ensure_ascii=False)
+                self.recognizer = self.vosk.KaldiRecognizer(self.model, sample_rate, grammar)
+            else:
+                self.recognizer = self.vosk.KaldiRecognizer(self.model, sample_rate)
+            self.recognizer.SetMaxAlternatives(self.max_alternatives)
+            self.recognizer_key = key
+        return self.recognizer
+
+    def recognize(self, samples, sample_rate, vocabulary=None):
+        recognizer = self.get_recognizer(sample_rate, vocabulary)
+        recognizer.AcceptWaveform(memoryview(np.ascontiguousarray(samples)).cast('B').tobytes())
+        result = json.loads(recognizer.FinalResult())
+        recognizer.Reset()
+
+        alternatives = [(alt.get('text', '').replace('[unk]', '').strip().lower(), alt.get('confidence', 0.0))
+                        for alt in result.get('alternatives', [])]
+        alternatives = [(text, score) for text, score in alternatives if text]
+        if not alternatives:
+            raise RecognitionError("Не удалось распознать речь")
+
+        # Vosk отдает логарифмические оценки, переводим их в вероятности
+        scores = np.array([score for text, score in alternatives], dtype=np.float64)
+        probabilities = np.exp(scores - scores.max())
+        probabilities /= probabilities.sum()
+        return rank_candidates(list(zip((text for text, score in alternatives), probabilities.tolist())),
+                               vocabulary)
+
+
+def rank_candidates(candidates, vocabulary=None):
+    """Сортировка гипотез: слова из словаря сессии выше, затем по уверенности"""
+    known = set(vocabulary) if vocabulary else set()
+    merged = {}
+    for text, confidence in candidates:
+        merged[text] = max(confidence, merged.get(text, 0.0))
+    return sorted(merged.items(), key=lambda item: (item[0] in known, item[1]), reverse=True)
+
+
+class RecognitionCache:
+    """Результаты распознавания на диске по хешу звука, с вытеснением давно не нужных.
+
+    Файл записи - JSON со списком гипотез; время изменения файла обновляется
+    при каждом попадании и служит отметкой последнего использования.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.total = None
+
+    @staticmethod
+    def key(samples, sample_rate, language_code, engine, vocabulary=None):
+        """Хеш int16 PCM в порядке little-endian вместе со всем, что влияет на результат.
+
+        vocabulary передается только для движков с грамматикой.
+        """
+        digest = hashlib.sha256(np.ascontiguousarray(samples, dtype='<i2').tobytes())
+        context = [sample_rate, language_code, engine, sorted(vocabulary) if vocabulary else None]
+        digest.update(json.dumps(context, ensure_ascii=False).encode('utf-8'))
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], f'{key}.json')
+
+    def get(self, key):
+        """Гипотезы [(текст, уверенность)] или None"""
+        path = self.path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                candidates = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return [(text, confidence) for text, confidence in candidates]
+
+    def put(self, key, candidates):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Запись через временный файл: параллельный читатель не увидит половину
+        temporary = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(candidates, f, ensure_ascii=False)
+        os.replace(temporary, path)
+        with self.lock:
+            if self.total is None:
+                self.total = sum(size for path, size, mtime in self.entries())
+            else:
+                self.total += os.path.getsize(path)
+            if self.total > self.max_bytes:
+                self.evict()
+
+    def entries(self):
+        """(путь, размер, время использования) всех записей"""
+        result = []
+        for root, directories, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.json'):
+                    try:
+                        stat = os.stat(os.path.join(root, name))
+                    except OSError:
+                        continue
+                    result.append((os.path.join(root, name), stat.st_size, stat.st_mtime))
+        return result
+
+    def evict(self):
+        """Удалить самые давно использованные записи, пока кеш не станет меньше 90% лимита"""
+        entries = sorted(self.entries(), key=lambda entry: entry[2])
+        self.total = sum(size for path, size, mtime in entries)
+        for path, size, mtime in entries:
+            if self.total <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self.total -= size
+
+
+class CachedBackend:
+    """Движок с кешем: одинаковый звук не распознается дважды.
+
+    Словарь сессии меняется каждый раунд, поэтому в ключ он входит только
+    у движков с грамматикой; у остальных кешируются гипотезы без словаря,
+    а слова сессии поднимаются наверх уже после чтения из кеша.
+    """
+
+    def __init__(self, backend, cache):
+        self.backend = backend
+        self.cache = cache
+        self.name = backend.name
+        self.language_code = backend.language_code
+
+    def recognize(self, samples, sample_rate, vocabulary=None):
+        grammar = vocabulary if self.backend.uses_grammar else None
+        key = self.cache.key(samples, sample_rate, self.language_code, self.name, grammar)
+        candidates = self.cache.get(key)
+        if candidates is None:
+            try:
+                candidates = self.backend.recognize(samples, sample_rate, grammar)
+            except ServiceError:
+                # Сбой сервиса не кешируем: при повторе он может пройти
+                raise
+            except RecognitionError:
+                candidates = []
+            self.cache.put(key, candidates)
+        if not candidates:
+            raise RecognitionError("Не удалось распознать речь")
+        return candidates if grammar else rank_candidates(candidates, vocabulary)
+
+
+# Кеш результатов: POLYGLOT_RECOGNITION_CACHE_MB=0 отключает его
+CACHE_MAX_BYTES = int(float(os.environ.get('POLYGLOT_RECOGNITION_CACHE_MB', 64)) * 1024 * 1024)
+
+_cache = None
+
+
+def get_cache():
+    global _cache
+    if _cache is None and CACHE_MAX_BYTES > 0:
+        _cache = RecognitionCache(user_path('recognition-cache'), CACHE_MAX_BYTES)
+    return _cache
+
+
+# Порядок выбора: сначала офлайн-движки
+ENGINES = [VoskBackend, GoogleBackend]
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(language_code, engine=None):
+    """Движок для языка; создается один раз и переиспользуется между раундами"""
+    engine = engine or os.environ.get('POLYGLOT_ASR')
+    with _backends_lock:
+        key = (language_code, engine)
+        if key not in _backends:
+            for backend_class in ENGINES:
+                if engine and backend_class.name != engine:
+                    continue
+                if engine or backend_class.available(language_code):
+                    backend = backend_class(language_code)
+                    cache = get_cache()
+                    _backends[key] = CachedBackend(backend, cache) if cache is not None else backend
+                    break
+            else:
+                raise RecognitionError(f"Нет движка распознавания '{engine}'")
+        return _backends[key]
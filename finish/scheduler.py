@@ -0,0 +1,113 @@
+import time
+import heapq
+
+from wordbank import add_learner_column
+
+DAY = 24 * 60 * 60
+
+# Оценки ответа по шкале SM-2
+QUALITY_CORRECT = 5
+QUALITY_ALMOST = 3
+QUALITY_WRONG = 1
+
+
+REVIEWS_TABLE = """
+    CREATE TABLE IF NOT EXISTS reviews (
+        learner TEXT NOT NULL DEFAULT '',
+        language TEXT NOT NULL,
+        deck TEXT NOT NULL,
+        key TEXT NOT NULL,
+        repetitions INTEGER NOT NULL,
+        interval REAL NOT NULL,
+        easiness REAL NOT NULL,
+        due REAL NOT NULL,
+        PRIMARY KEY (learner, language, deck, key)
+    )
+"""
+
+
+class Scheduler:
+    """Интервальные повторения по алгоритму SM-2 для одного ученика.
+
+    Сроки повторения хранятся в SQLite, а для выбора слов у каждого набора
+    есть куча (срок, ключ) в памяти с ленивым удалением устаревших записей.
+    learner - ученик на сервере класса, '' - игрок в окне игры.
+    """
+
+    def __init__(self, connection, learner=''):
+        self.connection = connection
+        self.learner = learner
+        add_learner_column(self.connection, 'reviews', REVIEWS_TABLE)
+        self.connection.execute(REVIEWS_TABLE)
+        self.heaps = {}
+        self.due_dates = {}
+
+    def load(self, language, deck):
+        """Куча сроков набора, строится один раз за запуск"""
+        if (language, deck) not in self.heaps:
+            rows = self.connection.execute(
+                "SELECT due, key FROM reviews WHERE learner = ? AND language = ? AND deck = ?",
+                (self.learner, language, deck)).fetchall()
+            heapq.heapify(rows)
+            self.heaps[(language, deck)] = rows
+            self.due_dates[(language, deck)] = {key: due for due, key in rows}
+        return self.heaps[(language, deck)], self.due_dates[(language, deck)]
+
+    def is_scheduled(self, language, deck, key):
+        """Было ли слово уже в повторениях"""
+        return key in self.load(language, deck)[1]
+
+    def due(self, language, deck, count, now=None):
+        """До count ключей, срок повторения которых наступил, самые просроченные первыми"""
+        now = time.time() if now is None else now
+        heap, due_dates = self.load(language, deck)
+        result = []
+        while heap and len(result) < count and heap[0][0] <= now:
+            due, key = heapq.heappop(heap)
+            # Запись устарела: слово уже перенесено на другой срок
+            if due_dates.get(key) != due or key in result:
+                continue
+            result.append(key)
+        # Возвращаем слова в кучу, срок изменится только после ответа
+        for key in result:
+            heapq.heappush(heap, (due_dates[key], key))
+        return result
+
+    def record(self, language, deck, key, quality, now=None):
+        """Записать результат ответа и перенести срок повторения"""
+        now = time.time() if now is None else now
+        row = self.connection.execute(
+            "SELECT repetitions, interval, easiness FROM reviews "
+            "WHERE learner = ? AND language = ? AND deck = ? AND key = ?",
+            (self.learner, language, deck, key)).fetchone()
+        repetitions, interval, easiness = row if row else (0, 0.0, 2.5)
+
+        if quality >= 3:
+            if repetitions == 0:
+                interval = 1.0
+            elif repetitions == 1:
+                interval = 6.0
+            else:
+                interval = interval * easiness
+            repetitions += 1
+            due = now + interval * DAY
+        else:
+            # Ошибка: слово возвращается в ближайшую сессию
+            repetitions = 0
+            interval = 0.0
+            due = now + 10 * 60
+        easiness = max(1.3, easiness + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO reviews (learner, language, deck, key, repetitions, interval, easiness, due) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.learner, language, deck, key, repetitions, interval, easiness, due))
+
+        heap, due_dates = self.load(language, deck)
+        due_dates[key] = due
+        heapq.heappush(heap, (due, key))
+        # Слишком много устаревших записей: перестраиваем кучу
+        if len(heap) > 2 * len(due_dates) + 64:
+            heap[:] = [(due, key) for key, due in due_dates.items()]
+            heapq.heapify(heap)
@@ -0,0 +1,275 @@
+"""Сервер POLYGLOT для класса: много игр одновременно по HTTP с JSON.
+
+    python finish/server.py [--host 0.0.0.0] [--port 8765]
+
+    GET    /languages                  языки и режимы
+    POST   /sessions                   {"learner": "ivanov", "language": "en", "mode": 2, "count": 10}
+                                       -> новая игра
+    GET    /sessions/<id>              состояние игры и текущее задание
+    POST   /sessions/<id>/answer       {"answer": "..."}; в устном режиме можно передать
+                                       гипотезы распознавания [["текст", уверенность], ...]
+    DELETE /sessions/<id>              закончить игру
+
+Правила те же, что в окне игры (GameSession). Словари и банк слов одни на все
+игры, у игры только слова раунда, счет и жизни. Сроки повторений и статистика
+ведутся для каждого ученика (learner) отдельно.
+
+Запросы разбираются в цикле asyncio, а правила игры и запись в SQLite
+выполняются в отдельном потоке базы: ожидание диска не задерживает остальные
+соединения, и к базе всегда обращается один поток.
+"""
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from session import Library, GameSession, MODE_NAMES, POINTS
+
+# Режимы, доступные через сервер: устный, письменный, тест, предложения
+SERVER_MODES = (1, 2, 3, 4)
+
+# Игра без ответов дольше этого времени удаляется, с
+SESSION_TIMEOUT = 30 * 60
+
+MAX_BODY = 64 * 1024
+
+# Длина идентификатора ученика
+MAX_LEARNER = 64
+
+REASONS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class HTTPError(Exception):
+    """Ошибка запроса с кодом ответа"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def is_integer(value):
+    """Целое число JSON; true и false в Python тоже int, их не принимаем"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def task(session):
+    """Текущее задание игры для клиента"""
+    if session.finished:
+        return None
+    item = session.current
+    if session.mode == 1:
+        return {'prompt': "Произнесите слово:", 'word': item[1], 'vocabulary': session.vocabulary}
+    if session.mode == 2:
+        return {'prompt': "Переведите слово:", 'word': item[0]}
+    if session.mode == 3:
+        return {'prompt': item['question'], 'options': item['options']}
+    return {'prompt': "Закончите предложение:", 'sentence': item[0]}
+
+
+def state(session_id, session):
+    return {
+        'id': session_id,
+        'learner': session.learner,
+        'language': session.language[1],
+        'mode': session.mode,
+        'score': session.score,
+        'max_score': session.max_score,
+        'lives': session.lives,
+        'word': session.index + 1,
+        'words': len(session.words),
+        'over': session.finished or session.lost,
+        'task': None if session.lost else task(session),
+    }
+
+
+class GameServer:
+    """Игры в памяти по идентификаторам и разбор запросов.
+
+    route и все, что он вызывает, выполняются в потоке базы executor;
+    Library создается там же, поэтому соединения SQLite не переходят между потоками.
+    """
+
+    def __init__(self, library=None):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='polyglot-db')
+        self.library = library or self.executor.submit(Library).result()
+        self.sessions = {}
+        self.touched = {}
+
+    def languages(self):
+        return {
+            'languages': [{'code': code, 'name': language['name'], 'flag': language['flag']}
+                          for code, language in self.library.repository.languages()],
+            'modes': {mode: MODE_NAMES[mode - 1] for mode in SERVER_MODES},
+        }
+
+    def create(self, body):
+        learner = body.get('learner')
+        code = body.get('language')
+        mode = body.get('mode')
+        count = body.get('count', 10)
+        if not isinstance(learner, str) or not 1 <= len(learner) <= MAX_LEARNER:
+            raise HTTPError(400, f"Нужен идентификатор ученика learner, до {MAX_LEARNER} символов")
+        if not isinstance(code, str) or code not in dict(self.library.repository.languages()):
+            raise HTTPError(400, f"Неизвестный язык {code!r}")
+        if not is_integer(mode) or mode not in SERVER_MODES:
+            raise HTTPError(400, f"Режим должен быть одним из {SERVER_MODES}")
+        if not is_integer(count) or not 1 <= count <= 50:
+            raise HTTPError(400, "count должен быть от 1 до 50")
+        session_id = uuid.uuid4().hex
+        self.sessions[session_id] = GameSession(self.library, code, mode, count, learner)
+        self.touched[session_id] = time.monotonic()
+        return state(session_id, self.sessions[session_id])
+
+    def get(self, session_id):
+        if session_id not in self.sessions:
+            raise HTTPError(404, "Игра не найдена")
+        self.touched[session_id] = time.monotonic()
+        return self.sessions[session_id]
+
+    def answer(self, session_id, body):
+        session = self.get(session_id)
+        answer = body.get('answer')
+        if session.finished or session.lost:
+            raise HTTPError(400, "Игра уже закончена")
+        if session.mode == 1 and isinstance(answer, list):
+            try:
+                answer = [(str(text), float(confidence)) for text, confidence in answer]
+            except (TypeError, ValueError):
+                raise HTTPError(400, "Гипотезы передаются как [[текст, уверенность], ...]")
+            if not answer:
+                raise HTTPError(400, "Пустой список гипотез")
+        elif not isinstance(answer, str):
+            raise HTTPError(400, "Нужен ответ answer")
+
+        expected = session.expected
+        grade = session.answer(answer)
+        session.advance()
+        result = state(session_id, session)
+        result.update(grade=grade, points=POINTS[grade], expected=expected)
+        if result['over']:
+            session.save_stats()
+            self.remove(session_id)
+        return result
+
+    def remove(self, session_id):
+        self.sessions.pop(session_id, None)
+        self.touched.pop(session_id, None)
+
+    def expire(self, now=None):
+        """Удалить брошенные игры"""
+        now = time.monotonic() if now is None else now
+        for session_id, touched in list(self.touched.items()):
+            if now - touched > SESSION_TIMEOUT:
+                self.remove(session_id)
+
+    def route(self, method, path, body):
+        """(код ответа, данные) для запроса"""
+        parts = [part for part in path.split('?')[0].split('/') if part]
+        if parts == ['languages'] and method == 'GET':
+            return 200, self.languages()
+        if parts == ['sessions'] and method == 'POST':
+            return 201, self.create(body)
+        if len(parts) == 2 and parts[0] == 'sessions':
+            if method == 'GET':
+                return 200, state(parts[1], self.get(parts[1]))
+            if method == 'DELETE':
+                self.get(parts[1])
+                self.remove(parts[1])
+                return 200, {'id': parts[1]}
+        if len(parts) == 3 and parts[0] == 'sessions' and parts[2] == 'answer' and method == 'POST':
+            return 200, self.answer(parts[1], body)
+        raise HTTPError(404 if method in ('GET', 'POST', 'DELETE') else 405, "Нет такого адреса")
+
+    async def handle(self, reader, writer):
+        """Соединение keep-alive: запросы читаются по очереди до закрытия"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length', 0))
+                try:
+                    if length > MAX_BODY:
+                        raise HTTPError(413, "Слишком большой запрос")
+                    raw = await reader.readexactly(length) if length else b''
+                    try:
+                        body = json.loads(raw) if raw else {}
+                    except ValueError:
+                        raise HTTPError(400, "Тело запроса должно быть JSON")
+                    if not isinstance(body, dict):
+                        raise HTTPError(400, "Тело запроса должно быть объектом JSON")
+                    status, data = await asyncio.get_running_loop().run_in_executor(
+                        self.executor, self.route, method, path, body)
+                except HTTPError as e:
+                    status, data = e.status, {'error': str(e)}
+                except Exception:
+                    # Ошибка сервера не должна обрывать соединение без ответа
+                    traceback.print_exc()
+                    status, data = 500, {'error': "Внутренняя ошибка сервера"}
+
+                payload = json.dumps(data, ensure_ascii=False).encode('utf-8')
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + payload)
+                await writer.drain()
+                if not keep_alive or status == 413:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def expire_forever(self):
+        while True:
+            await asyncio.sleep(60)
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.expire)
+
+
+async def serve(host, port, ready=None):
+    """Запустить сервер; ready(порт) вызывается, когда сервер слушает"""
+    game_server = GameServer()
+    server = await asyncio.start_server(game_server.handle, host, port)
+    if ready is not None:
+        ready(server.sockets[0].getsockname()[1])
+    expiry = asyncio.ensure_future(game_server.expire_forever())
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        expiry.cancel()
+        game_server.executor.shutdown(wait=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сервер POLYGLOT для нескольких игроков")
+    parser.add_argument('--host', default='127.0.0.1', help="адрес, 0.0.0.0 - для всех компьютеров сети")
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    def ready(port):
+        print(f"POLYGLOT слушает http://{args.host}:{port}", flush=True)
+
+    try:
+        asyncio.run(serve(args.host, args.port, ready))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
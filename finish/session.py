@@ -0,0 +1,273 @@
+"""Правила игры без интерфейса: выбор слов, проверка ответов, очки и жизни.
+
+GameWindow показывает GameSession на экране, а grade_batch проверяет
+множество ответов сразу, например домашние задания на сервере.
+"""
+import os
+
+from vocabulary import VocabularyRepository
+from wordbank import WordBank, CLOZE_DECK, item_key
+from stats import StatsStore
+from scheduler import Scheduler, QUALITY_CORRECT, QUALITY_ALMOST, QUALITY_WRONG
+from matching import MatchIndex, MATCH_EXACT, MATCH_CLOSE, MATCH_WRONG
+from distractors import DistractorIndex, make_test
+
+# Режимы по номеру: 1 - устный, 2 - письменный, 3 - тест, 4 - предложения, 5 - скоростной
+MODE_NAMES = ["Устный", "Письменный", "Тест", "Предложения", "Скоростной"]
+
+# Какой набор использует режим, задается подстановками в language.json
+DECK_NAMES = ['oral', 'writing', 'tests', 'sentences', 'writing']
+
+LIVES = 3
+MAX_POINTS = 10
+
+# Очки и оценка для интервальных повторений по результату сравнения
+POINTS = {MATCH_EXACT: MAX_POINTS, MATCH_CLOSE: 5, MATCH_WRONG: 0}
+QUALITIES = {MATCH_EXACT: QUALITY_CORRECT, MATCH_CLOSE: QUALITY_ALMOST, MATCH_WRONG: QUALITY_WRONG}
+
+# Время на ответ в скоростном режиме, с: по умолчанию и границы подстройки
+DRILL_TIME_LIMIT = 8.0
+DRILL_MIN_TIME_LIMIT = 2.0
+DRILL_MAX_TIME_LIMIT = 15.0
+
+
+def expected_answer(mode, item):
+    """Правильный ответ на элемент набора в режиме mode"""
+    if mode == 1:
+        return item[0]
+    if mode == 3:
+        return item['answer']
+    return item[1]
+
+
+def answer_language(mode, language):
+    """В письменном и скоростном режимах отвечают по-русски"""
+    return 'ru' if mode in (2, 5) else language
+
+
+def grade_answer(mode, index, item, answer):
+    """Оценка ответа: строка или гипотезы распознавания [(текст, уверенность)]"""
+    expected = expected_answer(mode, item)
+    if mode == 3:
+        # Варианты выбираются из списка, поэтому сравниваем точно
+        return MATCH_EXACT if answer == expected else MATCH_WRONG
+    if isinstance(answer, str):
+        return index.match(expected, answer)
+    return index.rank(expected, answer)[0][1]
+
+
+def grade_batch(mode, language, pairs, variants=None, others=()):
+    """Оценки для пар (элемент, ответ) без состояния игры: [(оценка, очки)].
+
+    Формы ответов считаются один раз на всю пачку. others - ответы набора:
+    ответ, совпадающий с другим словом набора или пачки, не засчитывается.
+    """
+    pairs = list(pairs)
+    index = None
+    if mode != 3:
+        index = MatchIndex({expected_answer(mode, item) for item, answer in pairs},
+                           answer_language(mode, language), variants, others)
+    return [(grade, POINTS[grade]) for grade in
+            (grade_answer(mode, index, item, answer) for item, answer in pairs)]
+
+
+class Library:
+    """Общие для всех игр словари, банк слов и базы повторений и статистики.
+
+    Словари и банк слов только читаются; сроки повторений и статистика
+    у каждого ученика свои (learner, '' - игрок в окне игры).
+    """
+
+    def __init__(self, repository=None, word_bank=None, stats_store=None):
+        self.repository = repository or VocabularyRepository()
+        self.word_bank = word_bank or WordBank()
+        self.stats_store = stats_store or StatsStore()
+        self.schedulers = {}
+        self.learner_stats = {}
+        self.distractor_indexes = {}
+        self.deck_answers_cache = {}
+        self.test_overrides = {}
+
+    def scheduler(self, learner=''):
+        """Повторения ученика: сроки и кучи в памяти только его"""
+        if learner not in self.schedulers:
+            self.schedulers[learner] = Scheduler(self.word_bank.connection, learner)
+        return self.schedulers[learner]
+
+    def stats(self, learner=''):
+        """Статистика ученика в общей базе"""
+        if learner not in self.learner_stats:
+            self.learner_stats[learner] = self.stats_store.for_learner(learner)
+        return self.learner_stats[learner]
+
+    def distractor_index(self, language, deck):
+        """Индекс похожих слов набора, строится заново, когда файл набора изменился"""
+        version = self.repository.version(language, deck)
+        cached = self.distractor_indexes.get((language, deck))
+        if cached is None or cached[0] != version:
+            cached = (version, DistractorIndex(self.word_bank.keys(language, deck)))
+            self.distractor_indexes[(language, deck)] = cached
+        return cached[1]
+
+    def deck_answers(self, mode, language, deck):
+        """Правильные ответы всех слов набора в режиме mode, читаются заново при изменении файла"""
+        version = self.repository.version(language, deck)
+        cached = self.deck_answers_cache.get((mode, language, deck))
+        if cached is None or cached[0] != version:
+            items = self.repository.deck(language, deck)
+            if isinstance(items, dict):
+                items = items.items()
+            cached = (version, [expected_answer(mode, item) for item in items])
+            self.deck_answers_cache[(mode, language, deck)] = cached
+        return cached[1]
+
+    def test_items(self, language):
+        """Вопросы из tests.json пакета по правильному ответу.
+
+        Файл необязательный: такие вопросы заменяют сгенерированные для тех же слов.
+        """
+        path = self.repository.path(language, 'tests')
+        if not os.path.isfile(path):
+            return {}
+        version = os.path.getmtime(path)
+        cached = self.test_overrides.get(language)
+        if cached is None or cached[0] != version:
+            items = self.repository.read_json(language, 'tests')
+            cached = (version, {item['answer']: item for item in items})
+            self.test_overrides[language] = cached
+        return cached[1]
+
+    def variants(self, language):
+        """Принятые варианты написания слов языка"""
+        return self.repository.language(language).get('variants', {})
+
+
+class GameSession:
+    """Одна игра: слова раунда, текущее слово, счет и жизни.
+
+    Словари и банк слов общие в Library, поэтому сессия занимает мало памяти,
+    и на сервере их можно держать сотнями.
+    """
+    __slots__ = ('library', 'learner', 'language', 'mode', 'index', 'score', 'lives',
+                 'deck', 'words', 'match_index', 'vocabulary')
+
+    def __init__(self, library, code, mode, count=10, learner=''):
+        self.library = library
+        self.learner = learner
+        self.language = (library.repository.language(code)['name'], code)
+        self.mode = mode
+        self.index = 0
+        self.score = 0
+        self.lives = LIVES
+        self.load_words(count)
+
+    def load_words(self, count):
+        """Загрузка слов для режима"""
+        library = self.library
+        scheduler = library.scheduler(self.learner)
+        code = self.language[1]
+        if self.mode == 4 and library.word_bank.size(code, CLOZE_DECK):
+            # Предложения из банка, собранного по корпусу (cloze.py)
+            language, deck = code, CLOZE_DECK
+        else:
+            language, deck = library.word_bank.sync(library.repository, code, DECK_NAMES[self.mode - 1])
+        self.deck = (language, deck)
+
+        # Сначала слова, которые пора повторить, самые просроченные первыми
+        due_keys = scheduler.due(language, deck, count)
+        words = library.word_bank.fetch_keys(language, deck, due_keys)
+
+        # Остаток добираем случайными словами из банка, новые в приоритете
+        if len(words) < count:
+            taken = set(due_keys)
+            candidates = [item for item in library.word_bank.sample(language, deck, count * 2)
+                          if item_key(item) not in taken]
+            candidates.sort(key=lambda item: scheduler.is_scheduled(language, deck, item_key(item)))
+            words += candidates[:count - len(words)]
+
+        # Вопросы теста составляются из пар слово-перевод любого набора
+        if self.mode == 3:
+            index = library.distractor_index(language, deck)
+            adverb = library.repository.language(language)['adverb']
+            overrides = library.test_items(language)
+            words = [dict(overrides[word], key=word) if word in overrides
+                     else make_test(index, word, translation, adverb)
+                     for word, translation in words]
+        self.words = words
+
+        # Нормализованные формы ответов считаются один раз на раунд;
+        # другие слова набора не засчитываются как опечатка
+        variants = library.variants(language) if self.mode == 1 else {}
+        self.match_index = None
+        if self.mode != 3:
+            others = library.deck_answers(self.mode, language, deck) if self.mode in (1, 2, 5) else ()
+            self.match_index = MatchIndex([expected_answer(self.mode, item) for item in words],
+                                          answer_language(self.mode, language), variants, others)
+
+        # Словарь сессии для распознавания только по словам раунда
+        self.vocabulary = []
+        if self.mode == 1:
+            self.vocabulary = [form.lower() for eng_word, ru_word in words
+                               for form in [eng_word, *variants.get(eng_word, [])]]
+
+    @property
+    def current(self):
+        return self.words[self.index]
+
+    @property
+    def expected(self):
+        """Правильный ответ на текущее слово"""
+        return expected_answer(self.mode, self.current)
+
+    @property
+    def max_score(self):
+        return len(self.words) * MAX_POINTS
+
+    @property
+    def lost(self):
+        return self.lives <= 0
+
+    @property
+    def finished(self):
+        return self.index >= len(self.words)
+
+    def best_hypothesis(self, candidates):
+        """(текст, оценка) лучшей гипотезы распознавания, при равенстве - более уверенной"""
+        text, grade, confidence = self.match_index.rank(self.expected, candidates)[0]
+        return text, grade
+
+    def grade(self, answer):
+        """Оценка ответа на текущее слово без изменения счета"""
+        return grade_answer(self.mode, self.match_index, self.current, answer)
+
+    def apply(self, grade):
+        """Начислить очки или снять жизнь, записать результат для повторений"""
+        self.library.scheduler(self.learner).record(*self.deck, item_key(self.current), QUALITIES[grade])
+        self.score += POINTS[grade]
+        if grade == MATCH_WRONG:
+            self.lives -= 1
+        return grade
+
+    def answer(self, answer, elapsed=None):
+        """Проверить ответ и применить результат; elapsed - время ответа в скоростном режиме"""
+        grade = self.apply(self.grade(answer))
+        if elapsed is not None and grade != MATCH_WRONG:
+            self.library.stats(self.learner).record_latency(self.language[1], self.expected, elapsed)
+        return grade
+
+    def time_limit(self):
+        """Время на ответ по истории слова: полтора p95, в заданных границах"""
+        latency = self.library.stats(self.learner).word_latency(self.language[1], self.expected)
+        if latency is None or latency[0] < 3:
+            return DRILL_TIME_LIMIT
+        samples, p50, p95 = latency
+        return min(DRILL_MAX_TIME_LIMIT, max(DRILL_MIN_TIME_LIMIT, p95 * 1.5))
+
+    def advance(self):
+        """Перейти к следующему слову"""
+        self.index += 1
+
+    def save_stats(self):
+        """Записать игру в статистику"""
+        self.library.stats(self.learner).append(self.language[0], MODE_NAMES[self.mode - 1],
+                                                self.score, self.max_score)
@@ -0,0 +1,115 @@
+import os
+import queue
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from audio import AudioCaptureService, VoiceActivityDetector, resample, RECOGNIZER_SAMPLE_RATE
+from recognition import get_backend, RecognitionError
+
+# Частота записи с микрофона, для распознавания сигнал приводится к 16 кГц
+CAPTURE_SAMPLE_RATE = int(os.environ.get('POLYGLOT_SAMPLE_RATE', 44100))
+
+class SpeechWorker(QThread):
+    """Постоянный поток записи и распознавания речи с очередью запросов"""
+    progress = pyqtSignal(int, int)
+    recorded = pyqtSignal(int)
+    # Гипотезы [(текст, уверенность)] или исключение, если попытка не удалась
+    finished = pyqtSignal(int, object)
+    
+    def __init__(self, capture=None, max_pending=1):
+        super().__init__()
+        self.duration = 3
+        self.capture = capture or AudioCaptureService(CAPTURE_SAMPLE_RATE)
+        self.requests = queue.Queue(maxsize=max_pending)
+        self.active_id = 0
+        
+    def submit(self, request_id, language_code, vocabulary):
+        """Поставить запрос в очередь, False если очередь переполнена"""
+        self.active_id = request_id
+        try:
+            self.requests.put_nowait(('speech', request_id, language_code, vocabulary))
+        except queue.Full:
+            return False
+        return True
+    
+    def warm_up(self, language_code):
+        """Заранее загрузить движок распознавания для языка"""
+        try:
+            self.requests.put_nowait(('warm_up', None, language_code, None))
+        except queue.Full:
+            pass
+    
+    def cancel(self, request_id):
+        """Отменить все запросы, кроме request_id"""
+        self.active_id = request_id
+    
+    def stop(self):
+        """Остановить поток"""
+        self.active_id = None
+        self.requests.put(None)
+        self.wait()
+    
+    def is_stale(self, request_id):
+        return request_id != self.active_id
+        
+    def run(self):
+        while True:
+            job = self.requests.get()
+            if job is None:
+                break
+            kind, request_id, language_code, vocabulary = job
+            
+            if kind == 'warm_up':
+                try:
+                    get_backend(language_code)
+                except Exception:
+                    pass
+                continue
+            
+            # Запрос устарел: игрок уже перешел к другому слову
+            if self.is_stale(request_id):
+                continue
+            try:
+                result = self.process(request_id, language_code, vocabulary)
+            except Exception as e:
+                # Ошибка уходит в окно тем же сигналом, текст для игрока - str(e)
+                result = e
+            if result is not None and not self.is_stale(request_id):
+                self.finished.emit(request_id, result)
+    
+    def process(self, request_id, language_code, vocabulary):
+        """Запись и распознавание одной попытки"""
+        recording = self.record(request_id)
+        if recording is None:
+            return None
+        self.recorded.emit(request_id)
+        
+        # Движок загружается один раз на язык и остается «теплым»
+        backend = get_backend(language_code)
+        if self.is_stale(request_id):
+            return None
+        recording = resample(recording, self.capture.sample_rate)
+        return backend.recognize(recording, RECOGNIZER_SAMPLE_RATE, vocabulary)
+    
+    def record(self, request_id):
+        """Запись до паузы после речи; None если запрос отменен"""
+        # Игрок уже вышел из игры: микрофон закрыт окном, не открываем его снова
+        if self.is_stale(request_id):
+            return None
+        # Устройство уже открыто: запись начинается с текущей позиции буфера
+        self.capture.start()
+        vad = VoiceActivityDetector(self.capture.sample_rate, max_duration=self.duration)
+        position = self.capture.mark()
+        
+        while not vad.feed(self.capture.read(position, vad.block_size)):
+            position += vad.block_size
+            if self.is_stale(request_id):
+                return None
+            self.progress.emit(request_id, vad.fill_percent)
+        self.progress.emit(request_id, 100)
+        
+        recording = vad.speech()
+        if recording is None:
+            raise RecognitionError("Речь не обнаружена")
+        # Передаем буфер напрямую, без записи на диск
+        return recording
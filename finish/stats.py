@@ -0,0 +1,192 @@
+import copy
+import math
+import sqlite3
+from datetime import datetime
+
+from wordbank import user_path, add_learner_column
+
+
+# Столбцы, по которым можно сортировать историю
+SORT_COLUMNS = ('played_at', 'language', 'mode', 'score')
+
+
+def format_date(played_at):
+    """Дата из базы в формате для экрана"""
+    return datetime.strptime(played_at, "%Y-%m-%d %H:%M:%S").strftime("%d.%m.%Y %H:%M")
+
+
+# Сколько последних ответов учитывается в процентилях времени ответа
+LATENCY_WINDOW = 50
+
+
+def percentile(sorted_values, fraction):
+    """Процентиль по ближайшему рангу для отсортированного списка"""
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+# Таблицы, у которых в прошлых версиях не было столбца learner
+TABLES = {
+    'games': """
+        CREATE TABLE IF NOT EXISTS games (
+            id INTEGER PRIMARY KEY,
+            learner TEXT NOT NULL DEFAULT '',
+            played_at TEXT NOT NULL,
+            language TEXT NOT NULL,
+            mode TEXT NOT NULL,
+            score INTEGER NOT NULL,
+            total INTEGER NOT NULL
+        )
+    """,
+    'aggregates': """
+        CREATE TABLE IF NOT EXISTS aggregates (
+            learner TEXT NOT NULL DEFAULT '',
+            language TEXT NOT NULL,
+            mode TEXT NOT NULL,
+            games INTEGER NOT NULL,
+            total_score INTEGER NOT NULL,
+            PRIMARY KEY (learner, language, mode)
+        )
+    """,
+    'latencies': """
+        CREATE TABLE IF NOT EXISTS latencies (
+            id INTEGER PRIMARY KEY,
+            learner TEXT NOT NULL DEFAULT '',
+            language TEXT NOT NULL,
+            word TEXT NOT NULL,
+            seconds REAL NOT NULL
+        )
+    """,
+    'word_latency': """
+        CREATE TABLE IF NOT EXISTS word_latency (
+            learner TEXT NOT NULL DEFAULT '',
+            language TEXT NOT NULL,
+            word TEXT NOT NULL,
+            samples INTEGER NOT NULL,
+            p50 REAL NOT NULL,
+            p95 REAL NOT NULL,
+            PRIMARY KEY (learner, language, word)
+        )
+    """,
+}
+
+
+class StatsStore:
+    """Журнал сыгранных игр в SQLite (WAL) с накопительными итогами.
+
+    Игры и время ответов записываются и читаются для ученика learner:
+    '' - игрок в окне игры, на сервере класса у каждого ученика свой.
+    """
+
+    def __init__(self, path=None, learner=''):
+        self.learner = learner
+        self.connection = sqlite3.connect(path or user_path('stats.sqlite3'))
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        for table, create in TABLES.items():
+            add_learner_column(self.connection, table, create)
+            self.connection.execute(create)
+        self.connection.executescript("""
+            CREATE INDEX IF NOT EXISTS games_played_at ON games (learner, played_at);
+            CREATE INDEX IF NOT EXISTS games_language_mode ON games (learner, language, mode, played_at);
+            CREATE INDEX IF NOT EXISTS games_score ON games (learner, score);
+            CREATE INDEX IF NOT EXISTS latencies_word ON latencies (learner, language, word, id);
+        """)
+
+    def for_learner(self, learner):
+        """Статистика другого ученика в той же базе"""
+        store = copy.copy(self)
+        store.learner = learner
+        return store
+
+    def append(self, language, mode, score, total, played_at=None):
+        """Добавить игру и обновить итоги в одной транзакции"""
+        played_at = played_at or datetime.now()
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO games (learner, played_at, language, mode, score, total) VALUES (?, ?, ?, ?, ?, ?)",
+                (self.learner, played_at.strftime("%Y-%m-%d %H:%M:%S"), language, mode, score, total))
+            self.connection.execute(
+                "INSERT INTO aggregates (learner, language, mode, games, total_score) VALUES (?, ?, ?, 1, ?) "
+                "ON CONFLICT (learner, language, mode) DO UPDATE SET "
+                "games = games + 1, total_score = total_score + excluded.total_score",
+                (self.learner, language, mode, score))
+
+    def totals(self):
+        """Всего игр и сумма очков"""
+        games, total_score = self.connection.execute(
+            "SELECT COALESCE(SUM(games), 0), COALESCE(SUM(total_score), 0) FROM aggregates WHERE learner = ?",
+            (self.learner,)).fetchone()
+        return games, total_score
+
+    def languages(self):
+        """Языки, по которым есть игры"""
+        return [row[0] for row in self.connection.execute(
+            "SELECT DISTINCT language FROM aggregates WHERE learner = ? ORDER BY language", (self.learner,))]
+
+    def filter_clause(self, language=None, mode=None, date_from=None, date_to=None):
+        """Условие WHERE и параметры для фильтров истории ученика"""
+        conditions, params = ["learner = ?"], [self.learner]
+        if language:
+            conditions.append("language = ?")
+            params.append(language)
+        if mode:
+            conditions.append("mode = ?")
+            params.append(mode)
+        if date_from:
+            conditions.append("played_at >= ?")
+            params.append(date_from.strftime("%Y-%m-%d 00:00:00"))
+        if date_to:
+            conditions.append("played_at <= ?")
+            params.append(date_to.strftime("%Y-%m-%d 23:59:59"))
+        return conditions, params
+
+    def query(self, filters=None, order_by='played_at', descending=True, after=None, limit=100):
+        """Страница истории с фильтрами и сортировкой на стороне базы.
+
+        after - (значение столбца сортировки, id) последней строки прошлой
+        страницы: следующая страница читается по индексу без OFFSET.
+        Строки: (id, played_at, language, mode, score, total).
+        """
+        if order_by not in SORT_COLUMNS:
+            raise ValueError(f"Нельзя сортировать по {order_by}")
+        conditions, params = self.filter_clause(**(filters or {}))
+        if after is not None:
+            conditions.append(f"({order_by}, id) {'<' if descending else '>'} (?, ?)")
+            params.extend(after)
+        direction = "DESC" if descending else "ASC"
+        return self.connection.execute(
+            f"SELECT id, played_at, language, mode, score, total FROM games WHERE {' AND '.join(conditions)} "
+            f"ORDER BY {order_by} {direction}, id {direction} LIMIT ?",
+            (*params, limit)).fetchall()
+
+    def summary(self, filters=None):
+        """Игр и сумма очков с учетом фильтров"""
+        filters = {key: value for key, value in (filters or {}).items() if value}
+        if not filters:
+            return self.totals()
+        conditions, params = self.filter_clause(**filters)
+        games, total_score = self.connection.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(score), 0) FROM games WHERE {' AND '.join(conditions)}",
+            params).fetchone()
+        return games, total_score
+
+    def record_latency(self, language, word, seconds):
+        """Записать время ответа и обновить p50/p95 слова по последним ответам"""
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO latencies (learner, language, word, seconds) VALUES (?, ?, ?, ?)",
+                (self.learner, language, word, seconds))
+            recent = sorted(row[0] for row in self.connection.execute(
+                "SELECT seconds FROM latencies WHERE learner = ? AND language = ? AND word = ? "
+                "ORDER BY id DESC LIMIT ?",
+                (self.learner, language, word, LATENCY_WINDOW)))
+            self.connection.execute(
+                "INSERT OR REPLACE INTO word_latency (learner, language, word, samples, p50, p95) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self.learner, language, word, len(recent), percentile(recent, 0.5), percentile(recent, 0.95)))
+
+    def word_latency(self, language, word):
+        """(число ответов, p50, p95) для слова или None"""
+        return self.connection.execute(
+            "SELECT samples, p50, p95 FROM word_latency WHERE learner = ? AND language = ? AND word = ?",
+            (self.learner, language, word)).fetchone()
@@ -0,0 +1,97 @@
+import os
+import json
+from collections import OrderedDict
+
+# Пакеты словарей: data/<код языка>/language.json и по файлу на набор слов
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+# Наборы слов языка, в отличие от наборов предложений
+WORD_DECKS = ('easy', 'medium', 'hard')
+
+
+class VocabularyRepository:
+    """Хранилище словарей, наборы слов читаются с диска по требованию"""
+
+    def __init__(self, root=DATA_DIR, cache_size=4):
+        self.root = root
+        self.cache_size = cache_size
+        self.meta = {}
+        self.decks = OrderedDict()
+
+    def languages(self):
+        """Список (код, описание) доступных языков"""
+        result = []
+        for code in os.listdir(self.root):
+            if os.path.isfile(os.path.join(self.root, code, 'language.json')):
+                result.append((code, self.language(code)))
+        result.sort(key=lambda item: (item[1].get('order', 0), item[0]))
+        return result
+
+    def language(self, code):
+        """Описание языка из language.json"""
+        if code not in self.meta:
+            self.meta[code] = self.read_json(code, 'language')
+        return self.meta[code]
+
+    def resolve(self, code, name):
+        """Код языка и имя набора с учетом подстановок из language.json"""
+        seen = set()
+        while (code, name) not in seen:
+            seen.add((code, name))
+            alias = self.language(code).get('aliases', {}).get(name)
+            if alias is None:
+                return code, name
+            if '/' in alias:
+                code, name = alias.split('/', 1)
+            else:
+                name = alias
+        raise ValueError(f"Циклическая подстановка набора {code}/{name}")
+
+    def deck(self, code, name):
+        """Набор слов; в памяти держится только несколько последних.
+
+        Измененный на диске файл читается заново.
+        """
+        key = self.resolve(code, name)
+        version = self.version(*key)
+        if key in self.decks and self.decks[key][0] == version:
+            self.decks.move_to_end(key)
+            return self.decks[key][1]
+        deck = self.read_json(*key)
+        self.decks[key] = (version, deck)
+        self.decks.move_to_end(key)
+        while len(self.decks) > self.cache_size:
+            self.decks.popitem(last=False)
+        return deck
+
+    def version(self, code, name):
+        """Версия файла набора с учетом подстановок: время его изменения"""
+        return os.path.getmtime(self.path(*self.resolve(code, name)))
+
+    def deck_words(self, code):
+        """Слова всех наборов языка, без учета наборов других языков"""
+        words = set()
+        for name in WORD_DECKS:
+            language, deck = self.resolve(code, name)
+            if language != code or not os.path.isfile(self.path(language, deck)):
+                continue
+            items = self.deck(language, deck)
+            words.update(items if isinstance(items, dict) else [item[0] for item in items])
+        return words
+
+    def audio_file(self, code, word):
+        """Путь записи произношения: data/<код>/audio/<слово в нижнем регистре>.wav"""
+        return os.path.join(self.root, code, 'audio', f'{word.lower()}.wav')
+
+    def audio_path(self, code, word):
+        """Запись произношения из пакета, либо None"""
+        path = self.audio_file(code, word)
+        return path if os.path.isfile(path) else None
+
+    def path(self, code, name):
+        """Путь к файлу набора без учета подстановок"""
+        return os.path.join(self.root, code, f'{name}.json')
+
+    def read_json(self, code, name):
+        with open(self.path(code, name), encoding='utf-8') as f:
+            return json.load(f)
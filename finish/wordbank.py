@@ -0,0 +1,152 @@
+import os
+import json
+import random
+import sqlite3
+
+# Папка с пользовательскими данными (банк слов, статистика)
+USER_DIR = os.environ.get('POLYGLOT_HOME', os.path.join(os.path.expanduser('~'), '.polyglot'))
+
+# Набор, в который cloze.py пишет предложения из корпуса
+CLOZE_DECK = 'cloze'
+
+
+def user_path(filename):
+    """Путь к файлу в папке пользователя, папка создается при необходимости"""
+    os.makedirs(USER_DIR, exist_ok=True)
+    return os.path.join(USER_DIR, filename)
+
+
+def add_learner_column(connection, table, create):
+    """Перестроить таблицу прошлой версии со столбцом learner в ключе.
+
+    create - CREATE TABLE новой схемы; старые строки достаются ученику ''.
+    """
+    columns = [row[1] for row in connection.execute(f"PRAGMA table_info({table})")]
+    if not columns or 'learner' in columns:
+        return
+    names = ', '.join(columns)
+    with connection:
+        connection.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+        connection.execute(create)
+        connection.execute(f"INSERT INTO {table} ({names}) SELECT {names} FROM {table}_old")
+        # Вместе со старой таблицей удаляются и ее индексы, новые создаст схема
+        connection.execute(f"DROP TABLE {table}_old")
+
+
+def item_key(item):
+    """Ключ элемента набора: слово-ответ или вопрос теста"""
+    if isinstance(item, dict):
+        return item.get('key', item['question'])
+    return item[0]
+
+
+class WordBank:
+    """Банк слов в SQLite с индексами для случайной выборки без загрузки набора"""
+
+    def __init__(self, path=None):
+        self.connection = sqlite3.connect(path or user_path('wordbank.sqlite3'))
+        # WAL: cloze.py может дописывать банк, пока открыта игра
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS decks (
+                language TEXT NOT NULL,
+                deck TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                source_mtime REAL,
+                PRIMARY KEY (language, deck)
+            );
+            CREATE TABLE IF NOT EXISTS words (
+                language TEXT NOT NULL,
+                deck TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                key TEXT NOT NULL,
+                item TEXT NOT NULL,
+                PRIMARY KEY (language, deck, position)
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS words_key ON words (language, deck, key);
+        """)
+
+    def sync(self, repository, code, name):
+        """Импортировать набор из пакета словаря, если он изменился.
+
+        Возвращает (язык, набор) после подстановок из language.json.
+        """
+        language, deck = repository.resolve(code, name)
+        mtime = repository.version(language, deck)
+        row = self.connection.execute(
+            "SELECT source_mtime FROM decks WHERE language = ? AND deck = ?", (language, deck)).fetchone()
+        if row is None or row[0] != mtime:
+            items = repository.deck(language, deck)
+            if isinstance(items, dict):
+                items = list(items.items())
+            self.import_items(language, deck, items, mtime)
+        return language, deck
+
+    def import_items(self, language, deck, items, source_mtime=None):
+        """Заменить содержимое набора"""
+        with self.connection:
+            self.connection.execute("DELETE FROM words WHERE language = ? AND deck = ?", (language, deck))
+            self.connection.executemany(
+                "INSERT INTO words (language, deck, position, key, item) VALUES (?, ?, ?, ?, ?)",
+                ((language, deck, position, item_key(item), json.dumps(item, ensure_ascii=False))
+                 for position, item in enumerate(items)))
+            self.connection.execute(
+                "INSERT OR REPLACE INTO decks (language, deck, size, source_mtime) VALUES (?, ?, ?, ?)",
+                (language, deck, len(items), source_mtime))
+
+    def append_items(self, language, deck, items):
+        """Дописать элементы в конец набора, повторы по ключу пропускаются.
+
+        Вызывается внутри транзакции вызывающего. Возвращает добавленные элементы.
+        """
+        position = self.size(language, deck)
+        added = []
+        for item in items:
+            cursor = self.connection.execute(
+                "INSERT OR IGNORE INTO words (language, deck, position, key, item) VALUES (?, ?, ?, ?, ?)",
+                (language, deck, position + len(added), item_key(item), json.dumps(item, ensure_ascii=False)))
+            if cursor.rowcount:
+                added.append(item)
+        self.connection.execute(
+            "INSERT INTO decks (language, deck, size, source_mtime) VALUES (?, ?, ?, NULL) "
+            "ON CONFLICT (language, deck) DO UPDATE SET size = excluded.size",
+            (language, deck, position + len(added)))
+        return added
+
+    def size(self, language, deck):
+        """Количество элементов в наборе"""
+        row = self.connection.execute(
+            "SELECT size FROM decks WHERE language = ? AND deck = ?", (language, deck)).fetchone()
+        return row[0] if row else 0
+
+    def keys(self, language, deck):
+        """Все ключи набора в порядке файла"""
+        return [row[0] for row in self.connection.execute(
+            "SELECT key FROM words WHERE language = ? AND deck = ? ORDER BY position", (language, deck))]
+
+    def sample(self, language, deck, count):
+        """count случайных элементов набора в случайном порядке"""
+        positions = random.sample(range(self.size(language, deck)), min(count, self.size(language, deck)))
+        return self.fetch(language, deck, positions)
+
+    def fetch(self, language, deck, positions):
+        """Элементы по позициям, в том же порядке"""
+        if not positions:
+            return []
+        placeholders = ', '.join('?' * len(positions))
+        rows = self.connection.execute(
+            f"SELECT position, item FROM words WHERE language = ? AND deck = ? AND position IN ({placeholders})",
+            (language, deck, *positions))
+        items = {position: json.loads(item) for position, item in rows}
+        return [items[position] for position in positions if position in items]
+
+    def fetch_keys(self, language, deck, keys):
+        """Элементы по ключам, в том же порядке"""
+        if not keys:
+            return []
+        placeholders = ', '.join('?' * len(keys))
+        rows = self.connection.execute(
+            f"SELECT key, item FROM words WHERE language = ? AND deck = ? AND key IN ({placeholders})",
+            (language, deck, *keys))
+        items = {key: json.loads(item) for key, item in rows}
+        return [items[key] for key in keys if key in items]
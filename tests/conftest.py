@@ -0,0 +1,29 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Модули игры лежат в finish/ и импортируются по имени, как при запуске из этой папки
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'finish'))
+
+# Банк слов, статистика и кэш распознавания пишутся во временную папку, а не в ~/.polyglot
+os.environ['POLYGLOT_HOME'] = tempfile.mkdtemp(prefix='polyglot-tests-')
+
+from session import Library
+from stats import StatsStore
+from vocabulary import VocabularyRepository, DATA_DIR
+from wordbank import WordBank
+
+
+@pytest.fixture
+def data_root():
+    """Папка словарей для library; тест может переопределить фикстуру своей копией"""
+    return DATA_DIR
+
+
+@pytest.fixture
+def library(tmp_path, data_root):
+    """Library со своими банком слов и статистикой во временной папке теста"""
+    return Library(VocabularyRepository(data_root), WordBank(str(tmp_path / 'wordbank.sqlite3')),
+                   StatsStore(str(tmp_path / 'stats.sqlite3')))
@@ -0,0 +1,73 @@
+import os
+import json
+import random
+import shutil
+
+import pytest
+
+from distractors import DistractorIndex, misspellings, make_test
+from matching import normalize
+from session import GameSession
+from vocabulary import DATA_DIR
+
+
+@pytest.fixture
+def data_root(tmp_path):
+    # Тесты меняют наборы на диске, поэтому library работает с копией словарей
+    root = tmp_path / 'data'
+    shutil.copytree(DATA_DIR, root)
+    return str(root)
+
+
+def write_deck(repository, code, name, deck):
+    path = repository.path(code, name)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(deck, f, ensure_ascii=False)
+    # Время изменения должно отличаться и на файловых системах с грубыми метками
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_neighbours_are_close_deck_words():
+    index = DistractorIndex(['house', 'horse', 'mouse', 'apple', 'hose'])
+    neighbours = index.neighbours('house', 3)
+    assert 'house' not in neighbours
+    assert set(neighbours) <= {'horse', 'mouse', 'hose'}
+    assert 'apple' not in index.neighbours('house', 4)
+
+
+def test_misspellings_differ_from_word():
+    typos = misspellings('window', 5, random.Random(1))
+    assert typos
+    assert all(normalize(typo) != 'window' for typo in typos)
+
+
+def test_make_test_options():
+    index = DistractorIndex(['house', 'horse', 'mouse', 'apple'])
+    item = make_test(index, 'house', 'дом', 'по-английски', random.Random(2))
+    assert item['answer'] == 'house' and item['key'] == 'house'
+    assert len(item['options']) == 4 and len(set(item['options'])) == 4
+    assert 'house' in item['options']
+
+
+def test_index_rebuilt_when_deck_edited_without_changing_size(library):
+    repository = library.repository
+    language, deck = library.word_bank.sync(repository, 'en', 'tests')
+    words = repository.deck(language, deck)
+    assert 'apple' in library.distractor_index(language, deck).words
+
+    # Опечатка исправлена: слов столько же, но одно другое
+    edited = {('aple' if word == 'apple' else word): translation for word, translation in words.items()}
+    write_deck(repository, language, deck, edited)
+    library.word_bank.sync(repository, 'en', 'tests')
+    index = library.distractor_index(language, deck)
+    assert 'aple' in index.words and 'apple' not in index.words
+
+
+def test_hand_written_tests_override_generated(library):
+    session = GameSession(library, 'en', 3, count=50)
+    by_answer = {item['answer']: item for item in session.words}
+    assert by_answer['apple']['options'] == ['apple', 'aple', 'appple', 'apel']
+    assert by_answer['apple']['key'] == 'apple'
+    # Для остальных слов вопросы по-прежнему генерируются
+    assert all('key' in item for item in session.words)
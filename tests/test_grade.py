@@ -0,0 +1,92 @@
+import wave
+
+import numpy as np
+import pytest
+
+import grade
+from grade import ResultWriter, FIELDS, grade_file, word_from_name
+from matching import MatchIndex, MATCH_EXACT
+from recognition import RecognitionError, ServiceError
+
+
+def row(file, error=''):
+    result = dict.fromkeys(FIELDS, '')
+    result.update(file=file, expected='apple', grade=0, points=0, error=error)
+    return result
+
+
+@pytest.mark.parametrize('name', ['results.csv', 'results.jsonl'])
+def test_resume_skips_only_graded_files(tmp_path, name):
+    path = str(tmp_path / name)
+    writer = ResultWriter(path)
+    writer.write(row('ok.wav'))
+    writer.write(row('service.wav', "Ошибка сервиса"))
+    writer.close()
+
+    writer = ResultWriter(path)
+    assert writer.done == {'ok.wav'}
+    # Повторная проверка дописывает строку, после нее файл считается проверенным
+    writer.write(row('service.wav'))
+    writer.close()
+    assert ResultWriter(path).done == {'ok.wav', 'service.wav'}
+
+
+def test_csv_header_written_once(tmp_path):
+    path = str(tmp_path / 'results.csv')
+    for file in ('a.wav', 'b.wav'):
+        writer = ResultWriter(path)
+        writer.write(row(file))
+        writer.close()
+    with open(path, encoding='utf-8') as f:
+        assert f.read().count('file,expected') == 1
+
+
+def test_word_from_name():
+    assert word_from_name('class1/ivanov_apple.wav') == 'apple'
+    assert word_from_name('petrov_ice-cream.wav') == 'ice cream'
+
+
+class StubBackend:
+    def __init__(self, result):
+        self.result = result
+
+    def recognize(self, samples, sample_rate, vocabulary=None):
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+@pytest.fixture
+def recording(tmp_path):
+    with wave.open(str(tmp_path / 'ivanov_apple.wav'), 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(np.zeros(1600, dtype='<i2').tobytes())
+    (tmp_path / 'broken.wav').write_bytes(b'not a wav')
+    return str(tmp_path)
+
+
+def grade_with(monkeypatch, root, path, result):
+    monkeypatch.setattr(grade, '_backend', StubBackend(result))
+    monkeypatch.setattr(grade, '_index', MatchIndex([], 'en'))
+    return grade_file(root, path, 'apple')
+
+
+def test_grade_file(monkeypatch, recording):
+    result = grade_with(monkeypatch, recording, 'ivanov_apple.wav', [('appel', 0.7), ('apple', 0.6)])
+    assert result['heard'] == 'apple' and result['grade'] == MATCH_EXACT and not result['error']
+
+
+def test_not_recognized_is_a_result(monkeypatch, recording):
+    result = grade_with(monkeypatch, recording, 'ivanov_apple.wav', RecognitionError("Не удалось распознать речь"))
+    assert result['grade'] == 0 and not result['error']
+
+
+@pytest.mark.parametrize('path, result', [
+    ('ivanov_apple.wav', ServiceError("Ошибка сервиса")),
+    ('broken.wav', [('apple', 1.0)]),
+    ('missing.wav', [('apple', 1.0)]),
+])
+def test_failures_are_errors(monkeypatch, recording, path, result):
+    assert grade_with(monkeypatch, recording, path, result)['error']
@@ -0,0 +1,71 @@
+from matching import (MatchIndex, bounded_distance, normalize, phonetic_key,
+                      MATCH_EXACT, MATCH_CLOSE, MATCH_WRONG)
+
+
+def test_bounded_distance():
+    assert bounded_distance('apple', 'apple', 1) == 0
+    assert bounded_distance('apple', 'aple', 1) == 1
+    # Перестановка соседних букв - одна ошибка
+    assert bounded_distance('apple', 'aplpe', 1) == 1
+    assert bounded_distance('kitten', 'sitting', 3) == 3
+
+
+def test_bounded_distance_stops_above_limit():
+    assert bounded_distance('kitten', 'sitting', 1) == 2
+    assert bounded_distance('a', 'abcdef', 2) == 3
+
+
+def test_normalize():
+    assert normalize('  Café!  ') == 'cafe'
+    assert normalize('Ёлка') == 'елка'
+    # С кириллицы «й» не снимается
+    assert normalize('чай') == 'чай'
+
+
+def test_phonetic_key():
+    assert phonetic_key('phone', 'en') == phonetic_key('fone', 'en')
+    assert phonetic_key('молоко', 'ru') == phonetic_key('малако', 'ru')
+
+
+def test_match():
+    index = MatchIndex(['apple'], 'en')
+    assert index.match('apple', 'Apple') == MATCH_EXACT
+    assert index.match('apple', 'aple') == MATCH_CLOSE
+    assert index.match('apple', 'an apple') == MATCH_CLOSE
+    assert index.match('apple', 'pear') == MATCH_WRONG
+    assert index.match('apple', '') == MATCH_WRONG
+
+
+def test_short_word_forgives_only_extra_letter():
+    index = MatchIndex(['cat'], 'en')
+    assert index.match('cat', 'cats') == MATCH_CLOSE
+    # Замена буквы в коротком слове дает другое слово
+    assert index.match('cat', 'hat') == MATCH_WRONG
+    assert index.match('cat', 'dog') == MATCH_WRONG
+
+
+def test_other_answer_is_wrong():
+    # car и cat - слова одного набора
+    index = MatchIndex(['cat', 'car'], 'en')
+    assert index.match('cat', 'car') == MATCH_WRONG
+    assert index.match('car', 'cat') == MATCH_WRONG
+    assert index.match('cat', 'Cat') == MATCH_EXACT
+
+
+def test_other_deck_word_is_wrong():
+    index = MatchIndex(['ragazzo'], 'it', others=['ragazzo', 'ragazza'])
+    assert index.match('ragazzo', 'ragazza') == MATCH_WRONG
+    assert index.match('ragazzo', 'ragazo') == MATCH_CLOSE
+
+
+def test_variants():
+    index = MatchIndex(['acknowledgment'], 'en', {'acknowledgment': ['acknowledgement']})
+    assert index.match('acknowledgment', 'acknowledgement') == MATCH_EXACT
+
+
+def test_rank_prefers_grade_then_confidence():
+    index = MatchIndex(['book'], 'en')
+    ranked = index.rank('book', [('look', 0.9), ('books', 0.5), ('book', 0.2)])
+    assert [(text, grade) for text, grade, confidence in ranked] == [
+        ('book', MATCH_EXACT), ('look', MATCH_CLOSE), ('books', MATCH_CLOSE)]
+
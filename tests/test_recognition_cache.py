@@ -0,0 +1,100 @@
+import os
+
+import numpy as np
+import pytest
+
+from recognition import RecognitionCache, CachedBackend, RecognitionError, ServiceError
+
+
+class CountingBackend:
+    name = 'stub'
+    language_code = 'en-EN'
+
+    def __init__(self, result, uses_grammar=False):
+        self.result = result
+        self.uses_grammar = uses_grammar
+        self.calls = 0
+        self.vocabularies = []
+
+    def recognize(self, samples, sample_rate, vocabulary=None):
+        self.calls += 1
+        self.vocabularies.append(vocabulary)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return RecognitionCache(str(tmp_path / 'cache'), 1024 * 1024)
+
+
+def samples(seed=0):
+    return np.random.default_rng(seed).integers(-1000, 1000, 1600).astype(np.int16)
+
+
+def test_key_depends_on_audio_and_context():
+    key = RecognitionCache.key(samples(), 16000, 'en-EN', 'vosk', ['cat'])
+    assert key == RecognitionCache.key(samples(), 16000, 'en-EN', 'vosk', ['cat'])
+    assert key != RecognitionCache.key(samples(1), 16000, 'en-EN', 'vosk', ['cat'])
+    assert key != RecognitionCache.key(samples(), 16000, 'en-EN', 'vosk', ['dog'])
+    assert key != RecognitionCache.key(samples(), 16000, 'en-EN', 'google', ['cat'])
+
+
+def test_second_call_is_a_hit(cache):
+    backend = CountingBackend([('cat', 0.9)])
+    cached = CachedBackend(backend, cache)
+    assert cached.recognize(samples(), 16000) == [('cat', 0.9)]
+    assert cached.recognize(samples(), 16000) == [('cat', 0.9)]
+    assert backend.calls == 1
+
+
+def test_vocabulary_only_reranks_without_grammar(cache):
+    backend = CountingBackend([('cut', 0.9), ('cat', 0.5)])
+    cached = CachedBackend(backend, cache)
+    assert cached.recognize(samples(), 16000, ['dog']) == [('cut', 0.9), ('cat', 0.5)]
+    # Новый раунд с другим словарем: звук тот же, распознавания нет, порядок по словам раунда
+    assert cached.recognize(samples(), 16000, ['cat']) == [('cat', 0.5), ('cut', 0.9)]
+    assert backend.calls == 1
+    assert backend.vocabularies == [None]
+
+
+def test_grammar_vocabulary_is_part_of_key(cache):
+    backend = CountingBackend([('cat', 0.9)], uses_grammar=True)
+    cached = CachedBackend(backend, cache)
+    cached.recognize(samples(), 16000, ['cat'])
+    cached.recognize(samples(), 16000, ['cat'])
+    cached.recognize(samples(), 16000, ['dog'])
+    assert backend.vocabularies == [['cat'], ['dog']]
+
+
+def test_not_recognized_is_cached(cache):
+    backend = CountingBackend(RecognitionError("Не удалось распознать речь"))
+    cached = CachedBackend(backend, cache)
+    for _ in range(2):
+        with pytest.raises(RecognitionError):
+            cached.recognize(samples(), 16000)
+    assert backend.calls == 1
+
+
+def test_service_errors_are_not_cached(cache):
+    backend = CountingBackend(ServiceError("Ошибка сервиса"))
+    cached = CachedBackend(backend, cache)
+    for _ in range(2):
+        with pytest.raises(ServiceError):
+            cached.recognize(samples(), 16000)
+    assert backend.calls == 2
+
+
+def test_least_recently_used_evicted(tmp_path):
+    cache = RecognitionCache(str(tmp_path / 'cache'), 700)
+    keys = [f'{number:064x}' for number in range(4)]
+    for age, key in enumerate(keys):
+        cache.put(key, [['x' * 150, 1.0]])
+        os.utime(cache.path(key), (age, age))
+    # Запись 0 только что прочитана, поэтому вытесняется следующая по давности
+    cache.get(keys[0])
+    cache.put('f' * 64, [['x' * 150, 1.0]])
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
+    assert sum(size for path, size, mtime in cache.entries()) <= 700 * 0.9
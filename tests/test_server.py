@@ -0,0 +1,181 @@
+import json
+import sqlite3
+import asyncio
+
+import pytest
+
+from server import GameServer, HTTPError, SESSION_TIMEOUT
+from scheduler import Scheduler
+from stats import StatsStore
+
+
+@pytest.fixture
+def server(library):
+    game_server = GameServer(library)
+    yield game_server
+    game_server.executor.shutdown()
+
+
+def create(server, **body):
+    body = {'learner': 'ivanov', 'language': 'en', 'mode': 2, 'count': 3, **body}
+    status, game = server.route('POST', '/sessions', body)
+    assert status == 201
+    return game
+
+
+def error_status(server, method, path, body=None):
+    with pytest.raises(HTTPError) as error:
+        server.route(method, path, body or {})
+    return error.value.status
+
+
+def test_languages(server):
+    status, data = server.route('GET', '/languages', {})
+    assert status == 200
+    assert 'en' in [language['code'] for language in data['languages']]
+
+
+def test_create_and_answer(server):
+    game = create(server)
+    assert game['learner'] == 'ivanov' and game['words'] == 3 and not game['over']
+    status, result = server.route('POST', f"/sessions/{game['id']}/answer", {'answer': 'совсем не то'})
+    assert status == 200
+    assert result['grade'] == 0 and result['lives'] == 2 and result['word'] == 2
+
+
+@pytest.mark.parametrize('body', [
+    {'language': ['x']},
+    {'language': 'xx'},
+    {'mode': True},
+    {'mode': 5},
+    {'mode': '2'},
+    {'count': True},
+    {'count': 0},
+    {'learner': ''},
+    {'learner': ['ivanov']},
+])
+def test_create_rejects_bad_fields(server, body):
+    assert error_status(server, 'POST', '/sessions', {'learner': 'ivanov', 'language': 'en', 'mode': 2, **body}) == 400
+
+
+def test_learner_required(server):
+    assert error_status(server, 'POST', '/sessions', {'language': 'en', 'mode': 2}) == 400
+
+
+def test_route_errors(server):
+    game = create(server)
+    assert error_status(server, 'GET', '/sessions/missing') == 404
+    assert error_status(server, 'GET', '/nowhere') == 404
+    assert error_status(server, 'PUT', '/sessions') == 405
+    assert error_status(server, 'POST', f"/sessions/{game['id']}/answer", {'answer': 5}) == 400
+    assert error_status(server, 'POST', f"/sessions/{game['id']}/answer", {'answer': [['a', 1]]}) == 400
+
+
+def test_oral_hypotheses(server):
+    game = create(server, mode=1)
+    path = f"/sessions/{game['id']}/answer"
+    assert error_status(server, 'POST', path, {'answer': [['a']]}) == 400
+    assert error_status(server, 'POST', path, {'answer': []}) == 400
+    expected = server.sessions[game['id']].expected
+    status, result = server.route('POST', path, {'answer': [['zzz', 0.9], [expected, 0.1]]})
+    assert result['grade'] == 2
+
+
+def test_delete_and_expire(server):
+    game = create(server)
+    assert server.route('DELETE', f"/sessions/{game['id']}", {}) == (200, {'id': game['id']})
+    assert error_status(server, 'GET', f"/sessions/{game['id']}") == 404
+    game = create(server)
+    server.expire(server.touched[game['id']] + SESSION_TIMEOUT + 1)
+    assert game['id'] not in server.sessions
+
+
+def test_learners_have_separate_repetitions_and_stats(server):
+    game = create(server, count=8)
+    session = server.sessions[game['id']]
+    while not session.finished and not session.lost:
+        server.route('POST', f"/sessions/{game['id']}/answer", {'answer': 'совсем не то'})
+    library = server.library
+    deck = session.deck
+    # У ivanov слова пора повторить, у petrov повторений еще нет
+    assert library.scheduler('ivanov').due(*deck, 10, now=10 ** 12)
+    assert library.scheduler('petrov').due(*deck, 10, now=10 ** 12) == []
+    assert library.stats('ivanov').totals()[0] == 1
+    assert library.stats('petrov').totals()[0] == 0
+    assert library.stats_store.totals()[0] == 0
+
+
+def test_old_databases_get_learner_column(tmp_path):
+    path = str(tmp_path / 'old.sqlite3')
+    connection = sqlite3.connect(path)
+    connection.executescript("""
+        CREATE TABLE reviews (language TEXT NOT NULL, deck TEXT NOT NULL, key TEXT NOT NULL,
+                              repetitions INTEGER NOT NULL, interval REAL NOT NULL,
+                              easiness REAL NOT NULL, due REAL NOT NULL,
+                              PRIMARY KEY (language, deck, key));
+        INSERT INTO reviews VALUES ('en', 'easy', 'apple', 1, 1.0, 2.5, 0);
+        CREATE TABLE games (id INTEGER PRIMARY KEY, played_at TEXT NOT NULL, language TEXT NOT NULL,
+                            mode TEXT NOT NULL, score INTEGER NOT NULL, total INTEGER NOT NULL);
+        CREATE INDEX games_played_at ON games (played_at);
+        INSERT INTO games VALUES (1, '2024-01-01 10:00:00', 'Английский', 'Тест', 30, 100);
+        CREATE TABLE aggregates (language TEXT NOT NULL, mode TEXT NOT NULL, games INTEGER NOT NULL,
+                                 total_score INTEGER NOT NULL, PRIMARY KEY (language, mode));
+        INSERT INTO aggregates VALUES ('Английский', 'Тест', 1, 30);
+    """)
+    connection.close()
+
+    # Прежние данные принадлежат игроку в окне игры
+    assert Scheduler(sqlite3.connect(path)).due('en', 'easy', 5, now=1) == ['apple']
+    assert Scheduler(sqlite3.connect(path), 'ivanov').due('en', 'easy', 5, now=1) == []
+    store = StatsStore(path)
+    assert store.totals() == (1, 30)
+    assert [row[0] for row in store.query()] == [1]
+    assert store.for_learner('ivanov').totals() == (0, 0)
+
+
+async def request(port, raw):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(raw)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    body = json.loads(await reader.readexactly(length))
+    writer.close()
+    return status, body
+
+
+def http(method, path, body):
+    payload = json.dumps(body).encode('utf-8')
+    return (f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n"
+            f"Content-Length: {len(payload)}\r\n\r\n").encode('latin-1') + payload
+
+
+def run_server(game_server, raw):
+    async def main():
+        server = await asyncio.start_server(game_server.handle, '127.0.0.1', 0)
+        async with server:
+            return await request(server.sockets[0].getsockname()[1], raw)
+    return asyncio.run(main())
+
+
+def test_handle_returns_json_errors():
+    game_server = GameServer()
+    try:
+        assert run_server(game_server, http('POST', '/sessions', {'language': ['x'], 'mode': 2}))[0] == 400
+        assert run_server(game_server, http('POST', '/sessions', [1, 2]))[0] == 400
+        status, game = run_server(game_server, http('POST', '/sessions', {'learner': 'a', 'language': 'en', 'mode': 3}))
+        assert status == 201 and game['task']['options']
+
+        def broken(method, path, body):
+            raise RuntimeError("сбой")
+        game_server.route = broken
+        assert run_server(game_server, http('GET', '/languages', {})) == (500, {'error': "Внутренняя ошибка сервера"})
+    finally:
+        game_server.executor.shutdown()
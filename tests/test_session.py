@@ -0,0 +1,88 @@
+from matching import MatchIndex, MATCH_EXACT, MATCH_CLOSE, MATCH_WRONG
+from session import (GameSession, grade_answer, grade_batch,
+                     LIVES, MAX_POINTS, POINTS, DRILL_TIME_LIMIT)
+from vocabulary import VocabularyRepository
+
+
+def test_grade_answer_by_mode():
+    assert grade_answer(2, MatchIndex(['яблоко'], 'ru'), ['apple', 'яблоко'], 'яблако') == MATCH_CLOSE
+    test = {'question': '?', 'options': ['apple', 'aple'], 'answer': 'apple'}
+    # В тесте вариант выбирается из списка, опечатка не засчитывается
+    assert grade_answer(3, None, test, 'aple') == MATCH_WRONG
+    assert grade_answer(3, None, test, 'apple') == MATCH_EXACT
+    # Устный режим: лучшая из гипотез распознавания
+    assert grade_answer(1, MatchIndex(['cat'], 'en'), ['cat', 'кошка'], [('cut', 0.4), ('cat', 0.3)]) == MATCH_EXACT
+
+
+def test_grade_batch():
+    item = ['apple', 'яблоко']
+    assert grade_batch(2, 'en', [(item, 'яблоко'), (item, 'яблако'), (item, 'груша')]) == [
+        (MATCH_EXACT, POINTS[MATCH_EXACT]), (MATCH_CLOSE, POINTS[MATCH_CLOSE]), (MATCH_WRONG, 0)]
+
+
+def test_grade_batch_other_deck_word():
+    # Слова из одного набора: другое слово не засчитывается как опечатка
+    assert grade_batch(1, 'en', [(['cat', 'кот'], 'car'), (['car', 'машина'], 'cat')]) == [
+        (MATCH_WRONG, 0), (MATCH_WRONG, 0)]
+    repository = VocabularyRepository()
+    assert grade_batch(1, 'it', [(['ragazzo', 'мальчик'], 'ragazza')],
+                       others=repository.deck_words('it')) == [(MATCH_WRONG, 0)]
+
+
+def test_session_rejects_other_deck_word(library):
+    session = GameSession(library, 'en', 1, count=1)
+    session.words = [['cat', 'кот']]
+    session.match_index.add('cat')
+    assert session.grade('car') == MATCH_WRONG
+    assert session.grade('cats') == MATCH_CLOSE
+    session = GameSession(library, 'en', 2, count=1)
+    session.words = [['cat', 'кот']]
+    session.match_index.add('кот')
+    assert session.grade('кит') == MATCH_WRONG
+
+
+def test_new_session(library):
+    session = GameSession(library, 'en', 2, count=5)
+    assert len(session.words) == 5
+    assert session.score == 0 and session.lives == LIVES
+    assert session.max_score == 5 * MAX_POINTS
+    assert not session.finished and not session.lost
+
+
+def test_scoring_and_lives(library):
+    session = GameSession(library, 'en', 2, count=5)
+    assert session.answer(session.expected) == MATCH_EXACT
+    assert session.score == MAX_POINTS and session.lives == LIVES
+    session.advance()
+    assert session.answer('совсем не то') == MATCH_WRONG
+    assert session.score == MAX_POINTS and session.lives == LIVES - 1
+
+
+def test_game_lost_after_all_lives(library):
+    session = GameSession(library, 'en', 2, count=5)
+    for _ in range(LIVES):
+        session.answer('совсем не то')
+        session.advance()
+    assert session.lost
+
+
+def test_finished_after_last_word(library):
+    session = GameSession(library, 'en', 3, count=3)
+    while not session.finished:
+        session.answer(session.current['answer'])
+        session.advance()
+    assert session.score == session.max_score
+
+
+def test_wrong_answer_brings_word_back_first(library):
+    session = GameSession(library, 'en', 2, count=3)
+    missed = session.current
+    session.answer('совсем не то')
+    # Ошибка возвращает слово через 10 минут
+    library.scheduler().record(*session.deck, missed[0], 1, now=0)
+    assert GameSession(library, 'en', 2, count=3).words[0] == missed
+
+
+def test_drill_time_limit_default(library):
+    session = GameSession(library, 'en', 5, count=3)
+    assert session.time_limit() == DRILL_TIME_LIMIT